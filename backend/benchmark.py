@@ -0,0 +1,241 @@
+"""
+End-to-end latency benchmark for the move, tension and status paths.
+
+Runs the same calls the /move, /tension and /motors/status handlers make
+against simulated drives (see simulator.py) and reports p50/p95/p99 per phase.
+Results are written as JSON so runs can be compared after transport or
+controller changes.
+
+Usage:
+    python benchmark.py --moves 200 --latency 0.0005 --jitter 0.0002 --output bench.json
+    python benchmark.py --rigs 8    # how far one process scales across rigs
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import time
+from typing import Dict, List
+
+from motor_driver import config
+from motor_driver.config import LoggingSettings, RigSettings
+from motor_driver.logging_setup import setup_logging, shutdown_logging
+from kinematic import KinematicsSolver
+from rigs import Rig
+from scheduler import MoveScheduler
+from simulator import SimulatedRig
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Nearest-rank percentiles of a list of millisecond samples."""
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+        return round(ordered[index], 4)
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 4),
+        "min_ms": round(ordered[0], 4),
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+
+def random_target(rng: random.Random, solver: KinematicsSolver) -> List[float]:
+    """A random target the solver accepts (on the stage and holdable with all cables taut)."""
+    geo = config.geometry
+    while True:
+        target = [
+            rng.uniform(0.2, 0.8) * geo.width_in,
+            rng.uniform(0.2, 0.8) * geo.height_in,
+            rng.uniform(0.2, 0.6) * geo.z_height_in,
+        ]
+        if solver.feasible([target])[0]:
+            return target
+
+
+async def bench_moves(scheduler: MoveScheduler, count: int, rng: random.Random, wait: bool = False) -> Dict[str, List[float]]:
+    """
+    Submits `count` targets through the move scheduler, as /move does. Each
+    move's completion is awaited (untimed) before the next submit, so every
+    sample is a /move into an idle rig; with `wait` the measured motion time
+    is reported too.
+    """
+    phases: Dict[str, List[float]] = {"plan": [], "schedule": [], "setup": [], "trigger": [], "write_skew": [], "ack_skew": [], "total": [], "motion": [], "motion_error": [], "errors": []}
+    for _ in range(count):
+        x, y, z = random_target(rng, scheduler.solver)
+        started = time.perf_counter()
+        try:
+            status, motion = await scheduler.submit(x, y, z)
+            triggered = time.perf_counter()
+            if motion is None:
+                continue
+            completion = await motion
+        except Exception:
+            phases["errors"].append((time.perf_counter() - started) * 1000)
+            continue
+        timings = motion.timings
+        total = (triggered - started) * 1000
+
+        # Queueing and commit: everything on the /move path besides planning and drive I/O.
+        phases["plan"].append(timings["plan_ms"])
+        phases["schedule"].append(total - timings["total_ms"] - timings["plan_ms"])
+        phases["setup"].append(timings["setup_ms"])
+        phases["trigger"].append(timings["trigger_ms"])
+        if "trigger_write_skew_ms" in timings:
+            phases["write_skew"].append(timings["trigger_write_skew_ms"])
+            phases["ack_skew"].append(timings["trigger_ack_skew_ms"])
+        phases["total"].append(total)
+        if wait:
+            phases["motion"].append(completion["move_ms"])
+            phases["motion_error"].append(completion["move_ms"] - completion["predicted_ms"])
+    return phases
+
+
+async def bench_calls(call, count: int) -> List[float]:
+    """Times `count` calls of `call`, awaiting its result if it is a coroutine."""
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            result = call()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception:
+            continue
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def merge(runs: List[Dict[str, List[float]]]) -> Dict[str, List[float]]:
+    merged: Dict[str, List[float]] = {}
+    for phases in runs:
+        for name, samples in phases.items():
+            merged.setdefault(name, []).extend(samples)
+    return merged
+
+
+async def bench_rig(rig: Rig, args: argparse.Namespace, rng: random.Random) -> Dict[str, List[float]]:
+    """Runs the whole benchmark against one rig; rigs run concurrently on the same loop."""
+    controller = rig.controller
+    await controller.stop_channel.open_all()
+    await rig.start()
+    geo = rig.settings.geometry
+    await rig.scheduler.calibrate(geo.width_in / 2, geo.height_in / 2, geo.z_height_in / 3)
+
+    await bench_moves(rig.scheduler, args.warmup, rng, wait=args.wait)
+    phases = await bench_moves(rig.scheduler, args.moves, rng, wait=args.wait)
+    phases["tension"] = await bench_calls(rig.tension.poll_all, args.polls)
+    phases["status"] = await bench_calls(controller.connection_status, args.polls)
+    phases["stop"] = await bench_calls(controller.emergency_stop_async, args.polls)
+    await rig.close()
+    return phases
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    sims = [
+        SimulatedRig(
+            udp=args.udp,
+            latency=args.latency,
+            jitter=args.jitter,
+            loss=args.loss,
+        )
+        for _ in range(args.rigs)
+    ]
+
+    for sim in sims:
+        await sim.start()
+    try:
+        transport = "udp" if args.udp else "tcp"
+        rigs = [
+            Rig(f"bench{i}", RigSettings(motors=sim.motor_settings(transport)))
+            for i, sim in enumerate(sims, start=1)
+        ]
+        runs = await asyncio.gather(*(
+            bench_rig(rig, args, random.Random(args.seed + i)) for i, rig in enumerate(rigs)
+        ))
+    finally:
+        for sim in sims:
+            await sim.stop()
+
+    move_phases = merge(runs)
+    tension, status, stops = move_phases["tension"], move_phases["status"], move_phases["stop"]
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "transport": "udp" if args.udp else "tcp",
+            "rigs": args.rigs,
+            "pipeline_commands": config.motion.pipeline_commands,
+            "sync_trigger": config.motion.sync_trigger,
+            "latency_s": args.latency,
+            "jitter_s": args.jitter,
+            "loss": args.loss,
+            "moves": args.moves,
+            "wait": args.wait,
+            "polls": args.polls,
+            "seed": args.seed,
+        },
+        "results": {
+            "move.plan": summarize(move_phases["plan"]),
+            "move.schedule": summarize(move_phases["schedule"]),
+            "move.setup": summarize(move_phases["setup"]),
+            "move.trigger": summarize(move_phases["trigger"]),
+            "move.trigger_write_skew": summarize(move_phases["write_skew"]),
+            "move.trigger_ack_skew": summarize(move_phases["ack_skew"]),
+            "move.total": summarize(move_phases["total"]),
+            "move.motion": summarize(move_phases["motion"]),
+            "move.motion_minus_predicted": summarize(move_phases["motion_error"]),
+            "move.failed": summarize(move_phases["errors"]),
+            "tension.poll_all": summarize(tension),
+            "motors.status": summarize(status),
+            "motors.emergency_stop": summarize(stops),
+        },
+    }
+
+
+def print_table(report: Dict) -> None:
+    print(f"{'phase':<26}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in report["results"].items():
+        if not stats.get("n"):
+            continue
+        print(f"{name:<26}{stats['n']:>6}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['max_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark move/tension/status latency against simulated drives.")
+    parser.add_argument("--moves", type=int, default=200)
+    parser.add_argument("--polls", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0005, help="Simulated one-way drive latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0002)
+    parser.add_argument("--loss", type=float, default=0.0)
+    parser.add_argument("--udp", action="store_true")
+    parser.add_argument("--rigs", type=int, default=1, help="Simulated rigs driven concurrently by one process; results are pooled across rigs")
+    parser.add_argument("--wait", action="store_true", help="Await each move's completion (real motion time) before the next")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--log-level", default="ERROR", help="Backend log level while benchmarking (logging itself is part of the measured cost)")
+    args = parser.parse_args()
+
+    setup_logging(LoggingSettings(level=args.log_level, levels={}))
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        shutdown_logging()
+    print_table(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    else:
+        print(json.dumps(report["results"]))
@@ -0,0 +1,207 @@
+"""
+Geometry auto-calibration: fits anchor positions and the effective step
+size to recorded (drive counters, known mic position) samples.
+"""
+
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from motor_driver.config import RigSettings
+from motor_driver.logging_setup import get_logger
+from kinematic import MOTOR_NAMES, DRIVE_SIGNS
+
+logger = get_logger("calibration")
+
+# 12 anchor coordinates, 4 cable lengths at the reference counts, 1 step size.
+_PARAMETERS = 17
+MIN_SAMPLES = 5
+
+
+class CalibrationSample(BaseModel):
+    """The mic at a known position and the drive counters (minus tension corrections) there."""
+    position: List[float]
+    counts: List[int]
+    voltages: Dict[str, float] = {}
+    recorded_at: float = 0.0
+
+
+class CalibrationResult(BaseModel):
+    geometry: Dict[str, List[float]]
+    kinematic_step_size: float
+    samples: int
+    cables_used: int
+    iterations: int
+    converged: bool
+    initial_rms_in: float
+    rms_in: float
+    max_in: float
+    motor_rms_in: Dict[str, float]
+    residuals_in: List[List[Optional[float]]]
+
+
+class SampleLog:
+    """Calibration samples of one rig, kept in memory and appended to a JSONL file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.samples: List[CalibrationSample] = []
+        if os.path.exists(path):
+            with open(path) as f:
+                self.samples = [CalibrationSample.model_validate_json(line) for line in f if line.strip()]
+
+    def add(self, sample: CalibrationSample) -> None:
+        sample.recorded_at = sample.recorded_at or time.time()
+        self.samples.append(sample)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(sample.model_dump_json() + "\n")
+
+    def clear(self) -> None:
+        self.samples = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _slack_mask(samples: List[CalibrationSample], settings: RigSettings) -> np.ndarray:
+    """(N, 4) mask of cables that read as slack, whose length then says nothing about the geometry."""
+    tension = settings.tension
+    mask = np.zeros((len(samples), 4), dtype=bool)
+    for row, sample in enumerate(samples):
+        for i, name in enumerate(MOTOR_NAMES):
+            voltage = sample.voltages.get(name)
+            if voltage is None:
+                continue
+            if name in tension.inverted_tension_motors:
+                mask[row, i] = voltage > tension.inverted_low_voltage_threshold
+            else:
+                mask[row, i] = voltage < tension.low_voltage_threshold
+    return mask
+
+
+def fit_geometry(samples: List[CalibrationSample], settings: RigSettings, iterations: int = 100, tolerance: float = 1e-10) -> CalibrationResult:
+    """
+    Levenberg-Marquardt fit of the four anchors, each cable's length at the
+    first sample's counters, and the step size, minimizing the difference
+    between anchor-to-position distances and the lengths the counters
+    imply. Starts from the rig's configured geometry. Cables that read as
+    slack in a sample are left out of it. Needs at least MIN_SAMPLES
+    samples spread over the workspace (not all in one plane).
+    """
+    if len(samples) < MIN_SAMPLES:
+        raise ValueError(f"At least {MIN_SAMPLES} samples are needed, got {len(samples)}")
+
+    positions = np.array([s.position for s in samples], dtype=float)
+    counts = np.array([s.counts for s in samples], dtype=float)
+    # Counts travelled since the first sample, signed so positive shortens the cable.
+    travelled = (counts - counts[0]) * DRIVE_SIGNS
+    used = ~_slack_mask(samples, settings)
+    if used.sum() < _PARAMETERS:
+        raise ValueError("Too few taut-cable readings to fit the geometry")
+
+    geo = settings.geometry
+    step0 = settings.kinematics.kinematic_step_size
+    anchors0 = np.array([geo.m1, geo.m2, geo.m3, geo.m4], dtype=float)
+
+    def unpack(params: np.ndarray):
+        return params[:12].reshape(4, 3), params[12:16], step0 * (1 + params[16])
+
+    def residuals(params: np.ndarray) -> np.ndarray:
+        anchors, lengths0, step = unpack(params)
+        distance = np.linalg.norm(positions[:, None, :] - anchors[None, :, :], axis=2)
+        return np.where(used, distance - (lengths0 - travelled * step), 0.0)
+
+    def jacobian(params: np.ndarray) -> np.ndarray:
+        anchors, _, _ = unpack(params)
+        offsets = positions[:, None, :] - anchors[None, :, :]
+        units = offsets / np.maximum(np.linalg.norm(offsets, axis=2, keepdims=True), 1e-9)
+        jac = np.zeros((len(samples), 4, _PARAMETERS))
+        for i in range(4):
+            jac[:, i, 3 * i:3 * i + 3] = -units[:, i, :]
+            jac[:, i, 12 + i] = -1.0
+        jac[:, :, 16] = travelled * step0
+        return (jac * used[..., None]).reshape(-1, _PARAMETERS)
+
+    lengths_start = np.linalg.norm(positions[0] - anchors0, axis=1)
+    params = np.concatenate([anchors0.ravel(), lengths_start, [0.0]])
+    # Start the lengths where the configured geometry fits best.
+    params[12:16] += (residuals(params) * used).sum(axis=0) / np.maximum(used.sum(axis=0), 1)
+
+    initial_cost = float(np.sum(residuals(params) ** 2))
+    cost, damping, converged, iteration = initial_cost, 1e-3, False, 0
+    for iteration in range(1, iterations + 1):
+        r = residuals(params).ravel()
+        jac = jacobian(params)
+        jtj = jac.T @ jac
+        gradient = jac.T @ r
+        scale = np.maximum(np.diag(jtj), 1e-12)
+        while True:
+            delta = np.linalg.solve(jtj + damping * np.diag(scale), -gradient)
+            candidate = params + delta
+            candidate_cost = float(np.sum(residuals(candidate) ** 2))
+            if candidate_cost <= cost or damping > 1e12:
+                break
+            damping *= 10
+        if candidate_cost > cost:
+            break
+        params, improvement, cost = candidate, cost - candidate_cost, candidate_cost
+        damping = max(damping / 10, 1e-12)
+        if improvement <= tolerance * max(cost, 1e-12) or np.abs(delta).max() < tolerance:
+            converged = True
+            break
+
+    anchors, _, step = unpack(params)
+    final = residuals(params)
+    count = used.sum()
+    result = CalibrationResult(
+        geometry={f"m{i + 1}": [round(float(v), 4) for v in anchor] for i, anchor in enumerate(anchors)},
+        kinematic_step_size=float(step),
+        samples=len(samples),
+        cables_used=int(count),
+        iterations=iteration,
+        converged=converged,
+        initial_rms_in=float(np.sqrt(initial_cost / count)),
+        rms_in=float(np.sqrt(cost / count)),
+        max_in=float(np.abs(final[used]).max()),
+        motor_rms_in={
+            name: float(np.sqrt(np.sum(final[:, i] ** 2) / max(used[:, i].sum(), 1))) for i, name in enumerate(MOTOR_NAMES)
+        },
+        residuals_in=[[float(v) if ok else None for v, ok in zip(row, mask)] for row, mask in zip(final, used)],
+    )
+    logger.info("Geometry fit over %d sample(s): RMS %.4f in -> %.4f in", len(samples), result.initial_rms_in, result.rms_in)
+    return result
+
+
+def env_lines(result: CalibrationResult) -> Dict[str, str]:
+    """The .env settings that apply a fit to the default rig."""
+    lines = {f"GEOMETRY__{name.upper()}": json.dumps(anchor) for name, anchor in result.geometry.items()}
+    lines["KINEMATICS__KINEMATIC_STEP_SIZE"] = f"{result.kinematic_step_size:.8g}"
+    return lines
+
+
+def write_env(result: CalibrationResult, path: str = ".env") -> Dict[str, str]:
+    """
+    Writes the fitted geometry and step size into an env file, replacing
+    existing settings and appending missing ones. Takes effect on restart.
+    """
+    values = env_lines(result)
+    lines = []
+    if os.path.exists(path):
+        with open(path) as f:
+            lines = f.read().splitlines()
+
+    pending = dict(values)
+    for index, line in enumerate(lines):
+        key = line.split("=", 1)[0].strip()
+        if key in pending:
+            lines[index] = f"{key}={pending.pop(key)}"
+    lines.extend(f"{key}={value}" for key, value in pending.items())
+
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    logger.info("Wrote calibrated geometry to %s", path)
+    return values
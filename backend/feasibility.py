@@ -0,0 +1,124 @@
+"""
+Cable-tension feasibility of mic positions: can the payload be held in
+static equilibrium with every cable taut and within its tension limit?
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from motor_driver.config import GeometrySettings, TensionSettings
+from workspace import WorkspaceGrid, geometry_key
+
+
+def tension_margin(anchors: np.ndarray, points, payload: float, t_min: float, t_max: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Best-case tension margin (N,) and the cable tensions achieving it (N, 4)
+    for a payload of `payload` hanging at each of the (N, 3) points.
+
+    Equilibrium gives three equations in four tensions, so the tensions
+    are t = t0 + s * n for the least-norm solution t0 and the null vector
+    n. The margin is the largest, over s, of the smallest distance of any
+    tension from its limits [t_min, t_max]: positive means every cable can
+    be kept taut and within its limit, negative means no tension set can.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    offsets = anchors[None, :, :] - points[:, None, :]
+    units = offsets / np.maximum(np.linalg.norm(offsets, axis=2, keepdims=True), 1e-9)
+    u = np.swapaxes(units, 1, 2)  # (N, 3, 4): column i is cable i's pull direction
+
+    # Null vector of the 3x4 system: signed 3x3 minors.
+    null = np.stack([
+        (-1) ** i * np.linalg.det(u[:, :, [j for j in range(4) if j != i]]) for i in range(4)
+    ], axis=1)
+    null /= np.maximum(np.linalg.norm(null, axis=1, keepdims=True), 1e-12)
+
+    weight = np.array([0.0, 0.0, payload])
+    gram = u @ np.swapaxes(u, 1, 2) + 1e-12 * np.eye(3)
+    base = np.einsum("nij,nj->ni", np.swapaxes(u, 1, 2), np.linalg.solve(gram, np.broadcast_to(weight, (len(points), 3))[..., None])[..., 0])
+
+    # Each cable's two bounds as lines c + s * k in s: t - t_min (slope n) and
+    # t_max - t (slope -n). One of them rises with s and the other falls.
+    lower, upper = base - t_min, t_max - base
+    up = null > 0
+    c_rise, k_rise = np.where(up, lower, upper), np.abs(null)
+    c_fall, k_fall = np.where(up, upper, lower), -np.abs(null)
+
+    # The maximum of a minimum of lines is the lowest crossing of a rising
+    # line with a falling one (LP duality), so crossings need not be checked
+    # against the other bounds.
+    moving = np.abs(null) > 1e-12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = (c_fall[:, None, :] - c_rise[:, :, None]) / (k_rise[:, :, None] - k_fall[:, None, :])
+        values = np.where(moving[:, :, None] & moving[:, None, :], c_rise[:, :, None] + s * k_rise[:, :, None], np.inf)
+    flat = values.reshape(len(points), -1)
+    best = np.argmin(flat, axis=1)
+    rows = np.arange(len(points))
+    margin = flat[rows, best]
+    crossing = np.nan_to_num(s.reshape(len(points), -1)[rows, best], posinf=0.0, neginf=0.0)
+    # A cable the null vector leaves alone has fixed tension, which caps the margin directly.
+    fixed = np.where(moving, np.inf, np.minimum(lower, upper)).min(axis=1)
+    margin = np.minimum(margin, fixed)
+    tensions = base + crossing[:, None] * null
+    return margin, tensions
+
+
+class FeasibilityMap:
+    """
+    tension_margin() precomputed on the workspace grid for one geometry,
+    payload and tension range, cached on disk next to the cable-length
+    grid. margin() is then a trilinear lookup, exact at grid nodes; points
+    near the threshold being tested are solved exactly instead.
+    """
+
+    def __init__(
+        self,
+        geometry: GeometrySettings,
+        tension: TensionSettings,
+        spacing: float = 1.0,
+        cache_dir: str = "workspace_cache",
+        grid: Optional[WorkspaceGrid] = None,
+    ):
+        # Shares the solver's cable-length grid when it has one.
+        self.grid = grid or WorkspaceGrid(geometry, spacing, cache_dir)
+        self.payload = tension.payload_lbf
+        self.t_min = tension.min_cable_tension_lbf
+        self.t_max = tension.max_cable_tension_lbf
+        self._name = "margin-" + geometry_key(geometry, spacing, self.payload, self.t_min, self.t_max)
+        self._margin: Optional[np.ndarray] = None
+
+    @property
+    def margin_grid(self) -> np.ndarray:
+        """(nx, ny, nz) tension margin (lbf) at every grid node."""
+        if self._margin is None:
+            self._margin = self.grid.load_or_build(
+                self._name, (),
+                lambda p: self.exact(p.reshape(-1, 3))[0].reshape(p.shape[:-1]),
+            )
+        return self._margin
+
+    def exact(self, points) -> Tuple[np.ndarray, np.ndarray]:
+        """tension_margin() at the points themselves, skipping the grid."""
+        return tension_margin(self.grid.anchors, points, self.payload, self.t_min, self.t_max)
+
+    def margin(self, points, near: Optional[float] = None) -> np.ndarray:
+        """
+        Interpolated tension margin (lbf) at (N, 3) points on the stage. With
+        `near`, points whose cell corners come within the cell's own spread
+        of that level get the exact margin instead, so comparisons against
+        it are not decided by interpolation error at the boundary.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        corners, weights = self.grid._corners(self.margin_grid, points)
+        margin = np.einsum("cn,cn->n", weights, corners)
+        if near is not None:
+            low, high = corners.min(axis=0), corners.max(axis=0)
+            spread = high - low
+            close = (low - spread <= near) & (high + spread >= near)
+            if close.any():
+                margin[close] = self.exact(points[close])[0]
+        return margin
+
+    def feasible(self, points, min_margin: float = 0.0) -> np.ndarray:
+        """Boolean mask of the points whose margin is at least `min_margin`."""
+        return self.margin(points, near=min_margin) >= min_margin
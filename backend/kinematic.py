@@ -3,24 +3,101 @@ Kinematics solver for microphone positioning system.
 """
 
 import math
-from typing import Dict, List, Optional
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
 from motor_driver.commands import CommandSequence
-from motor_driver.config import config as motor_config
+from motor_driver.config import RigSettings, config as motor_config
+from motor_driver.motion import synchronized_profiles
+from motor_driver.logging_setup import get_logger
+from workspace import WorkspaceGrid
+from feasibility import FeasibilityMap
+
+logger = get_logger("kinematics")
+
+MOTOR_NAMES = ["motor1", "motor2", "motor3", "motor4"]
+# Drive counter direction per motor: a positive count shortens the cable,
+# except on motor2, which is wound the other way (see plan()).
+DRIVE_SIGNS = np.array([1, -1, 1, 1])
+# Fractions of a straight-line piece checked against the path tolerance.
+_LINE_SAMPLES = np.linspace(0.05, 0.95, 19)
+
+
+@dataclass
+class MovePlan:
+    """A solved move: per-motor commands and the cable lengths and drive counts it leaves behind once executed."""
+    target: List[float]
+    command_map: Dict[str, List[str]]
+    lengths: List[float]
+    counts: List[int]
+    duration: float = 0.0
+
+
+@dataclass
+class BulkSolution:
+    """
+    solve_many() results for N targets, one column per motor (motor1..motor4).
+    Steps use plan()'s sign (positive shortens the cable), before motor2's
+    flip; velocities/accels/decels are the Pacer VE/AC/DE of each move.
+    """
+    lengths: np.ndarray
+    steps: np.ndarray
+    velocities: np.ndarray
+    accels: np.ndarray
+    decels: np.ndarray
+    durations: np.ndarray
+
 
 class KinematicsSolver:
-    def __init__(self):
-        self.config = motor_config
+    def __init__(self, settings: Optional[RigSettings] = None):
+        self.config = settings or motor_config.default_rig
         self.last_lengths: Optional[List[float]] = None
+        self.last_position: Optional[List[float]] = None
+        # Cable lengths and drive counters at calibration. Every target is
+        # converted to absolute drive counts from this reference, so rounding
+        # to whole steps never accumulates between moves.
+        self.reference_lengths: Optional[List[float]] = None
+        self.reference_counts: Optional[List[int]] = None
+        # Commanded drive counters, and the part of them that tension
+        # corrections added without moving the mic.
+        self.counts: Optional[List[int]] = None
+        self.corrections: List[int] = [0, 0, 0, 0]
+        self.estimated_position: Optional[List[float]] = None
         self.max_x = self.config.geometry.width_in
         self.max_y = self.config.geometry.height_in
         self.max_z = self.config.geometry.z_height_in
+        geo = self.config.geometry
+        self.anchors = np.array([geo.m1, geo.m2, geo.m3, geo.m4], dtype=float)
+        squared = np.sum(self.anchors ** 2, axis=1)
+        self._trilateration_inverse = np.linalg.inv(2 * (self.anchors[1:] - self.anchors[0]))
+        self._trilateration_offset = squared[1:] - squared[0]
+        kin = self.config.kinematics
+        self.grid = WorkspaceGrid(geo, kin.grid_spacing_in, kin.grid_cache_dir) if kin.grid_enabled else None
+        tension = self.config.tension
+        self.feasibility = (
+            FeasibilityMap(geo, tension, kin.grid_spacing_in, kin.grid_cache_dir, grid=self.grid)
+            if tension.feasibility_check else None
+        )
+
+    def load_grids(self) -> None:
+        """Opens the workspace grid and feasibility map, building them if needed. Blocking."""
+        if self.grid is not None:
+            self.grid.lengths_grid
+        if self.feasibility is not None:
+            self.feasibility.margin_grid
 
     def _get_distance(self, p1: List[float], p2: List[float]) -> float:
         """Calculates 3D Euclidean distance between two points."""
         return math.sqrt(((p2[0]-p1[0])**2)+((p2[1]-p1[1])**2)+((p2[2]-p1[2])**2))
 
-    def calibrate_position(self, x: float, y: float, z: float):
-        """Sets the current physical position of the mic (Calibration)."""
+    def calibrate_position(self, x: float, y: float, z: float, counts: Optional[Sequence[int]] = None):
+        """
+        Sets the current physical position of the mic (Calibration).
+        `counts` are the drives' position counters (motor1..motor4) at this
+        position. With them, moves are absolute (FP) to exact counts;
+        without them, moves are relative (FL) and forward_counts() and
+        resync() are unavailable.
+        """
         current_pos = [x, y, z]
         geo = self.config.geometry
         
@@ -31,74 +108,411 @@ class KinematicsSolver:
             self._get_distance(geo.m4, current_pos)
         ]
 
-        print(f"DEBUG: System calibrated at {current_pos}. Lengths: {self.last_lengths}")
+        self.last_position = current_pos
+        self.estimated_position = current_pos
+        self.reference_lengths = list(self.last_lengths)
+        self.reference_counts = list(counts) if counts is not None else None
+        self.counts = list(counts) if counts is not None else [0, 0, 0, 0]
+        self.corrections = [0, 0, 0, 0]
 
-    def solve(self, x: float, y: float, z: float) -> Dict[str, List[str]]:
+        logger.info("System calibrated at %s. Lengths: %s", current_pos, self.last_lengths)
+
+    def _lengths(self, point: List[float]) -> List[float]:
+        geo = self.config.geometry
+        return [self._get_distance(anchor, point) for anchor in (geo.m1, geo.m2, geo.m3, geo.m4)]
+
+    def _line_deviation(self, start, ends, fractions) -> np.ndarray:
+        """
+        Distance (inches), for each of the (E, 3) `ends` and each of the
+        `fractions` of start -> end, between the straight-line point and
+        where the mic is when every cable length has moved linearly instead,
+        i.e. the path a single synchronized move takes. That position is the
+        least-squares fit of the interpolated lengths, refined from the
+        straight-line point. Returns (E, len(fractions)).
         """
-        Converts 3D geometry coordinates to motor positions and command sequences.
-        Implements the 'Pacer' algorithm to synchronize motor start/stop times.
+        start = np.asarray(start, dtype=float)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 3)
+        fractions = np.asarray(fractions, dtype=float).reshape(1, -1, 1)
+        straight = (start + fractions * (ends[:, None, :] - start)).reshape(-1, 3)
+        l0 = self.lengths_many(start)
+        lengths = (l0 + fractions * (self.lengths_many(ends)[:, None, :] - l0)).reshape(-1, 4)
+        actual = self._gauss_newton(lengths, straight, iterations=5, tolerance=1e-6)
+        return np.linalg.norm(actual - straight, axis=1).reshape(len(ends), -1)
+
+    def segment_line(self, start: List[float], end: List[float], tolerance: Optional[float] = None) -> List[List[float]]:
+        """
+        Splits the straight line start -> end into pieces whose
+        synchronized-move paths stay within `tolerance` inches of the line
+        (KINEMATICS__PATH_TOLERANCE_IN by default), checked at
+        _LINE_SAMPLES points of each piece. Greedy: every piece is extended
+        as far along the line as it still fits, which gives the fewest
+        pieces since a shorter piece never deviates more. Each end is found
+        by bisection to 1/4096 of the line, starting from the previous
+        piece's length. At most KINEMATICS__MAX_PATH_SEGMENTS pieces; the
+        last one takes the rest of the line. Returns the points to move
+        through, ending with `end`.
         """
-        if self.last_lengths is None:
+        tolerance = tolerance if tolerance is not None else self.config.kinematics.path_tolerance_in
+        limit = max(1, self.config.kinematics.max_path_segments)
+        start, end = np.asarray(start, dtype=float), np.asarray(end, dtype=float)
+
+        def fits(a: float, b: float) -> bool:
+            piece = start + np.array([a, b])[:, None] * (end - start)
+            return self._line_deviation(piece[0], piece[1], _LINE_SAMPLES).max() <= tolerance
+
+        points = []
+        done, length = 0.0, 1.0
+        while len(points) < limit - 1 and not fits(done, 1.0):
+            # Bracket the farthest end that fits: `low` fits, `high` does not.
+            low, high = done, 1.0
+            guess = min(done + length, 1.0)
+            while guess < high and fits(done, guess):
+                low, guess = guess, min(done + 2 * (guess - done), 1.0)
+            high = min(high, guess)
+            while high - low > 1 / 4096:
+                middle = (low + high) / 2
+                if fits(done, middle):
+                    low = middle
+                else:
+                    high = middle
+            length = (low if low > done else high) - done
+            done += length
+            points.append((start + done * (end - start)).tolist())
+        points.append(end.tolist())
+        logger.debug("Straight line %s -> %s in %d segment(s)", start.tolist(), end.tolist(), len(points))
+        return points
+
+    def segment_path(self, waypoints: List[List[float]], start: Optional[List[float]] = None) -> List[List[float]]:
+        """segment_line applied to each leg of a tour, starting from the current position."""
+        start = start or self.last_position
+        if start is None:
             raise RuntimeError("System not calibrated! Call calibrate_position() first.")
+        points = []
+        for waypoint in waypoints:
+            points.extend(self.segment_line(start, waypoint))
+            start = waypoint
+        return points
 
+    def check_bounds(self, x: float, y: float, z: float) -> None:
+        """Raises ValueError if the target is outside the stage or cannot be held with all cables taut."""
         if not (0 <= x <= self.max_x and 0 <= y <= self.max_y and 0 <= z <= self.max_z):
              raise ValueError(f"Target ({x}, {y}, {z}) is out of bounds [0-{self.max_x}, 0-{self.max_y}, 0-{self.max_z}]")
+        self.check_feasible([[x, y, z]])
+
+    def in_bounds(self, points) -> np.ndarray:
+        """Boolean mask of the (N, 3) points that lie on the stage."""
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        upper = np.array([self.max_x, self.max_y, self.max_z])
+        return np.all((points >= 0) & (points <= upper), axis=1)
+
+    def check_bounds_many(self, points) -> None:
+        """check_bounds for an (N, 3) array; the error names the first offending point."""
+        mask = self.in_bounds(points)
+        if not mask.all():
+            index = int(np.argmin(mask))
+            x, y, z = (float(v) for v in np.asarray(points, dtype=float).reshape(-1, 3)[index])
+            raise ValueError(f"Target {index} ({x}, {y}, {z}) is out of bounds [0-{self.max_x}, 0-{self.max_y}, 0-{self.max_z}]")
+        self.check_feasible(points)
+
+    def tension_margin(self, points) -> np.ndarray:
+        """
+        Tension margin (lbf) of each of the (N, 3) points from the feasibility
+        map (see feasibility.tension_margin); infinite when the check is off.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if self.feasibility is None:
+            return np.full(len(points), np.inf)
+        return self.feasibility.margin(points, near=self.config.tension.min_tension_margin_lbf)
+
+    def feasible(self, points) -> np.ndarray:
+        """Boolean mask of the (N, 3) points that are on the stage and pass the tension check."""
+        return self.in_bounds(points) & (self.tension_margin(points) >= self.config.tension.min_tension_margin_lbf)
+
+    def check_feasible(self, points) -> None:
+        """Raises ValueError naming the first point the cables cannot hold taut (TENSION__FEASIBILITY_CHECK)."""
+        if self.feasibility is None:
+            return
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        margin = self.tension_margin(points)
+        bad = margin < self.config.tension.min_tension_margin_lbf
+        if bad.any():
+            index = int(np.argmax(bad))
+            x, y, z = (float(v) for v in points[index])
+            raise ValueError(
+                f"Target ({x}, {y}, {z}) cannot be held with all cables taut "
+                f"(tension margin {margin[index]:.2f} lbf for a {self.config.tension.payload_lbf} lbf payload)"
+            )
+
+    def lengths_many(self, points, tolerance: Optional[float] = None) -> np.ndarray:
+        """
+        Cable lengths from every anchor to each of the (N, 3) points, as (N, 4).
+        With a `tolerance` (inches) and the workspace grid enabled, lengths are
+        interpolated from the grid; points whose guaranteed error bound
+        exceeds the tolerance are solved exactly. plan() and solve_many()
+        pass KINEMATICS__GRID_TOLERANCE_IN.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if tolerance is None or self.grid is None:
+            return np.linalg.norm(points[:, None, :] - self.anchors[None, :, :], axis=2)
+
+        lengths, bound = self.grid.lengths(points)
+        exact = np.any(bound > tolerance, axis=1)
+        if exact.any():
+            lengths[exact] = np.linalg.norm(points[exact, None, :] - self.anchors[None, :, :], axis=2)
+        return lengths
+
+    def cable_directions(self, points) -> np.ndarray:
+        """Unit vectors (N, 4, 3) from each anchor towards the points, from the grid when enabled."""
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if self.grid is not None:
+            return self.grid.directions(points)
+        offsets = points[:, None, :] - self.anchors[None, :, :]
+        return offsets / np.maximum(np.linalg.norm(offsets, axis=2, keepdims=True), 1e-9)
+
+    @property
+    def absolute(self) -> bool:
+        """Whether moves are issued as FP to absolute drive counts."""
+        return self.config.kinematics.absolute_moves and self.reference_counts is not None
+
+    def _origin(self) -> np.ndarray:
+        """Drive counts at calibration plus tension corrections, i.e. counts at the reference lengths."""
+        return np.asarray(self.reference_counts or [0, 0, 0, 0]) + np.asarray(self.corrections)
+
+    def counts_for(self, lengths) -> np.ndarray:
+        """Absolute drive counts (N, 4) that put the cables closest to the given (N, 4) lengths."""
+        shortened = np.asarray(self.reference_lengths) - np.asarray(lengths, dtype=float).reshape(-1, 4)
+        steps = np.rint(shortened / self.config.kinematics.kinematic_step_size).astype(np.int64)
+        return self._origin() + steps * DRIVE_SIGNS
+
+    def lengths_at(self, counts) -> np.ndarray:
+        """Cable lengths (N, 4) the solver's own counts (N, 4) correspond to."""
+        travelled = (np.asarray(counts, dtype=float).reshape(-1, 4) - self._origin()) * DRIVE_SIGNS
+        return np.asarray(self.reference_lengths) - travelled * self.config.kinematics.kinematic_step_size
+
+    def solve_many(self, points, from_counts: Optional[List[int]] = None) -> BulkSolution:
+        """
+        Vectorized plan() for an (N, 3) array of targets, each solved as a
+        single move from the committed counts (or `from_counts`). Returns
+        the lengths, step deltas and Pacer profiles of all N moves without
+        building command lists or changing the solver's state.
+        """
+        if self.counts is None:
+            raise RuntimeError("System not calibrated! Call calibrate_position() first.")
+        start = np.asarray(self.counts if from_counts is None else from_counts)
+
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        self.check_bounds_many(points)
+
+        lengths = self.lengths_many(points, tolerance=self.config.kinematics.grid_tolerance_in)
+        steps = (self.counts_for(lengths) - start) * DRIVE_SIGNS
+
+        distances = np.abs(steps) / motor_config.motion.steps_per_rev
+        profiles, durations = synchronized_profiles(
+            distances,
+            velocity=self.config.default_speed,
+            accel=self.config.default_accel,
+            decel=self.config.default_decel,
+        )
+        return BulkSolution(
+            lengths=lengths,
+            steps=steps,
+            velocities=profiles[..., 0],
+            accels=profiles[..., 1],
+            decels=profiles[..., 2],
+            durations=durations,
+        )
+
+    def plan(self, x: float, y: float, z: float, from_counts: Optional[List[int]] = None) -> MovePlan:
+        """
+        Converts 3D geometry coordinates to motor positions and command sequences
+        without changing the solver's state; apply with commit() once executed.
+        Plans from `from_counts` instead of the committed counts when given.
+        The target is rounded to whole steps from the calibration reference
+        and issued as an absolute (FP) move when the reference counters are
+        known, otherwise as the relative (FL) move between the counts.
+        Implements the 'Pacer' algorithm to synchronize motor start/stop times:
+        every motor gets its own VE/AC/DE so all trapezoids share the same
+        phase times (see synchronized_profiles).
+        """
+        if self.counts is None:
+            raise RuntimeError("System not calibrated! Call calibrate_position() first.")
+        start = list(self.counts if from_counts is None else from_counts)
+
+        self.check_bounds(x, y, z)
 
         target_pos = [x, y, z]
-        geo = self.config.geometry
         
-        print(f"KINEMATICS: Solving for Target {target_pos}")
+        logger.debug("Solving for Target %s", target_pos)
         
-        new_lengths = [
-            self._get_distance(geo.m1, target_pos),
-            self._get_distance(geo.m2, target_pos),
-            self._get_distance(geo.m3, target_pos),
-            self._get_distance(geo.m4, target_pos)
-        ]
+        new_lengths = self.lengths_many(target_pos, tolerance=self.config.kinematics.grid_tolerance_in)[0].tolist()
         
-        print(f"KINEMATICS: Calculated Lengths: {new_lengths}")
+        logger.debug("Calculated Lengths: %s", new_lengths)
 
-        step_val = self.config.kinematics.kinematic_step_size
-        command_map = {}
-        motor_names = ["motor1", "motor2", "motor3", "motor4"]
-        
-        motor_steps = []
-        for i in range(4):
-            diff = self.last_lengths[i] - new_lengths[i]
-            steps = int(diff / step_val)
-            motor_steps.append(steps)
+        target_counts = self.counts_for(new_lengths)[0].tolist()
+        drive_steps = [t - c for t, c in zip(target_counts, start)]
+        # Lengths actually reached, rounded to whole steps from the reference.
+        reached = self.lengths_at(target_counts)[0].tolist()
             
-        abs_steps = [abs(s) for s in motor_steps]
+        abs_steps = [abs(s) for s in drive_steps]
         max_steps = max(abs_steps)
         
         if max_steps == 0:
-            print("KINEMATICS: No movement required.")
-            return {}
+            logger.debug("No movement required.")
+            return MovePlan(target=target_pos, command_map={}, lengths=self.lengths_at(start)[0].tolist(), counts=start)
         
-        print(f"KINEMATICS: Steps: {motor_steps}")
-        print(f"KINEMATICS: Pacer Max Steps: {max_steps}")
+        logger.debug("Steps: %s", drive_steps)
+        logger.debug("Pacer Max Steps: %s", max_steps)
 
-        target_speed = self.config.default_speed
+        steps_per_rev = motor_config.motion.steps_per_rev
+        profiles, duration = synchronized_profiles(
+            np.asarray(abs_steps) / steps_per_rev,
+            velocity=self.config.default_speed,
+            accel=self.config.default_accel,
+            decel=self.config.default_decel,
+        )
+        logger.debug("Pacer duration: %.1f ms", duration * 1000)
         
-        for i, name in enumerate(motor_names):
-            steps = motor_steps[i]
-            
-            speed = (abs(steps) / max_steps) * target_speed
-                
-            if speed < 0.1: speed = 0.1 
-            
-            print(f"KINEMATICS: {name} -> Steps: {steps}, Speed: {speed:.4f}")
+        command_map = {}
+        build = CommandSequence.move_absolute if self.absolute else CommandSequence.move_relative
+        for i, name in enumerate(MOTOR_NAMES):
+            speed, accel, decel = profiles[i].tolist()
+            position = target_counts[i] if self.absolute else drive_steps[i]
             
-            if name == "motor2":
-                steps = -1 * steps
+            logger.debug("%s -> Steps: %s, Speed: %.4f, Accel: %.3f, Decel: %.3f", name, drive_steps[i], speed, accel, decel)
             
-            command_map[name] = CommandSequence.move_relative(
-                steps,
+            command_map[name] = build(
+                position,
                 speed=speed,
-                accel=self.config.default_accel,
-                decel=self.config.default_decel
+                accel=accel,
+                decel=decel
             )
 
-        self.last_lengths = new_lengths
-        
-        return command_map
\ No newline at end of file
+        return MovePlan(target=target_pos, command_map=command_map, lengths=reached, counts=target_counts, duration=duration)
+
+    def trilaterate(self, lengths) -> np.ndarray:
+        """
+        Closed-form positions (N, 3) for (N, 4) cable lengths: subtracting
+        motor1's sphere equation from the others leaves a linear system.
+        Exact for consistent lengths; the starting point for forward_many().
+        """
+        lengths = np.asarray(lengths, dtype=float).reshape(-1, 4)
+        squared = lengths ** 2
+        rhs = self._trilateration_offset - (squared[:, 1:] - squared[:, :1])
+        return rhs @ self._trilateration_inverse.T
+
+    def _gauss_newton(self, lengths: np.ndarray, positions: np.ndarray, iterations: int, tolerance: float) -> np.ndarray:
+        """Refines each row until its step falls below `tolerance`; converged rows are left alone."""
+        positions = positions.copy()
+        active = np.arange(len(positions))
+        for _ in range(iterations):
+            offsets = positions[active, None, :] - self.anchors[None, :, :]
+            distances = np.maximum(np.linalg.norm(offsets, axis=2), 1e-9)
+            jacobian = offsets / distances[..., None]
+            residual = distances - lengths[active]
+            jtj = np.einsum("nki,nkj->nij", jacobian, jacobian) + 1e-9 * np.eye(3)
+            jtr = np.einsum("nki,nk->ni", jacobian, residual)
+            delta = np.linalg.solve(jtj, -jtr[..., None])[..., 0]
+            positions[active] += delta
+            active = active[np.abs(delta).max(axis=1) >= tolerance]
+            if not len(active):
+                break
+        return positions
+
+    def forward_many(self, lengths, initial=None, iterations: int = 20, tolerance: float = 1e-9) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Forward kinematics for (N, 4) cable lengths: the (N, 3) positions that
+        best fit them in the least-squares sense, by Gauss-Newton over the
+        four anchors, and the RMS length residual (inches) of each fit. A
+        large residual means the lengths are inconsistent, e.g. a slack cable.
+        Starts from `initial` (one per row or shared) when given, otherwise
+        from trilaterate(); warm-started rows that fit poorly are retried
+        from trilaterate() too.
+        """
+        lengths = np.asarray(lengths, dtype=float).reshape(-1, 4)
+        if initial is None:
+            start = self.trilaterate(lengths)
+        else:
+            start = np.broadcast_to(np.asarray(initial, dtype=float), (len(lengths), 3))
+        positions = self._gauss_newton(lengths, start, iterations, tolerance)
+        rms = np.sqrt(np.mean((self.lengths_many(positions) - lengths) ** 2, axis=1))
+
+        retry = rms > self.config.kinematics.kinematic_step_size
+        if initial is not None and retry.any():
+            candidates = self._gauss_newton(lengths[retry], self.trilaterate(lengths[retry]), iterations, tolerance)
+            candidate_rms = np.sqrt(np.mean((self.lengths_many(candidates) - lengths[retry]) ** 2, axis=1))
+            better = candidate_rms < rms[retry]
+            index = np.flatnonzero(retry)[better]
+            positions[index] = candidates[better]
+            rms[index] = candidate_rms[better]
+        return positions, rms
+
+    def forward(self, lengths: Sequence[float]) -> Tuple[List[float], float]:
+        """
+        Position for one set of cable lengths, warm-started from the previous
+        estimate, and the fit's RMS residual. Updates estimated_position.
+        """
+        start = self.estimated_position or self.last_position
+        positions, residuals = self.forward_many(lengths, initial=start)
+        self.estimated_position = positions[0].tolist()
+        return self.estimated_position, float(residuals[0])
+
+    def lengths_from_counts(self, counts) -> np.ndarray:
+        """
+        Cable lengths (N, 4) for drive position counters (N, 4) read from the
+        drives, relative to the calibration reference and tension corrections.
+        """
+        if self.reference_counts is None:
+            raise RuntimeError("No drive position reference. Calibrate with the drives connected.")
+        return self.lengths_at(counts)
+
+    def forward_counts(self, counts: Sequence[int]) -> Tuple[List[float], float]:
+        """forward() from the drives' position counters (motor1..motor4)."""
+        return self.forward(self.lengths_from_counts(counts)[0])
+
+    def plan_path(self, waypoints: List[List[float]]) -> List[MovePlan]:
+        """Plans consecutive moves through waypoints, each starting where the previous one ends."""
+        self.check_bounds_many(waypoints)
+        plans = []
+        counts = self.counts
+        for x, y, z in waypoints:
+            plan = self.plan(x, y, z, from_counts=counts)
+            plans.append(plan)
+            counts = plan.counts
+        return plans
+
+    def commit(self, plan: MovePlan) -> None:
+        """Records a planned move as executed."""
+        self.last_lengths = plan.lengths
+        self.last_position = plan.target
+        self.counts = plan.counts
+
+    def record_correction(self, motor_name: str, steps: int) -> None:
+        """
+        Accounts for a tension correction of `steps` drive counts on one
+        motor. It changes the drive's counter without moving the mic, so
+        later targets and forward kinematics are offset by it.
+        """
+        if self.counts is None:
+            return
+        i = MOTOR_NAMES.index(motor_name)
+        self.counts[i] += steps
+        self.corrections[i] += steps
+
+    def resync(self, counts: Sequence[int]) -> Tuple[List[float], float]:
+        """
+        Adopts counters read from the drives (after a stop or a failed move)
+        as the committed state, and returns the position they put the mic
+        at with the fit's RMS residual.
+        """
+        lengths = self.lengths_from_counts(counts)[0]
+        position, residual = self.forward(lengths)
+        self.counts = [int(c) for c in counts]
+        self.last_lengths = lengths.tolist()
+        self.last_position = position
+        return position, residual
+
+    def solve(self, x: float, y: float, z: float) -> Dict[str, List[str]]:
+        """Plans a move and commits it immediately. Returns the per-motor command lists."""
+        plan = self.plan(x, y, z)
+        self.commit(plan)
+        return plan.command_map
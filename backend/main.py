@@ -3,14 +3,22 @@ FastAPI application for AUTOMIC motor control system.
 Exposes REST endpoints for frontend to control motors.
 """
 
-from typing import Literal
-from fastapi import FastAPI, HTTPException
+import math
+from typing import List, Literal
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
-from motor_driver import MotorController, config
-from kinematic import KinematicsSolver
-from tension import TensionService
+from motor_driver import config
+from motor_driver.logging_setup import get_logger, setup_logging, shutdown_logging
+from motor_driver.metrics import metrics
+from calibration import CalibrationSample, env_lines, fit_geometry, write_env
+from feasibility import tension_margin
+from kinematic import MOTOR_NAMES
+from rigs import DEFAULT_RIG, Rig, RigRegistry
+
+logger = get_logger("api")
 
 class MoveRequest(BaseModel):
     """Request to move microphone to XYZ position."""
@@ -18,6 +26,11 @@ class MoveRequest(BaseModel):
     y: float
     z: float
 
+class MoveBatchRequest(BaseModel):
+    """Ordered waypoints for a multi-point tour."""
+    waypoints: List[MoveRequest]
+    straight: bool = False
+
 class TensionFixRequest(BaseModel):
     motor: str
     direction: Literal["tighten", "loosen"]
@@ -30,17 +43,17 @@ app = FastAPI(
 
 @app.on_event("startup")
 async def startup_event():
-    print("="*50)
-    print("AUTOMIC BACKEND STARTED")
-    print("="*50)
-    print(f"Configuration Loaded:")
-    print(f"  Motor IPs: {config.motor1_ip}, {config.motor2_ip}, {config.motor3_ip}, {config.motor4_ip}")
-    print(f"  Step Size: {config.kinematics.kinematic_step_size}")
-    print(f"  Geometry M1: {config.geometry.m1}")
-    print(f"  Geometry M2: {config.geometry.m2}")
-    print(f"  Geometry M3: {config.geometry.m3}")
-    print(f"  Geometry M4: {config.geometry.m4}")
-    print("="*50)
+    setup_logging()
+    await registry.start()
+    logger.info("AUTOMIC BACKEND STARTED")
+    logger.info("Motor IPs: %s, %s, %s, %s", config.motor1_ip, config.motor2_ip, config.motor3_ip, config.motor4_ip)
+    logger.info("Step Size: %s", config.kinematics.kinematic_step_size)
+    logger.info("Geometry M1: %s  M2: %s  M3: %s  M4: %s", config.geometry.m1, config.geometry.m2, config.geometry.m3, config.geometry.m4)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await registry.close()
+    shutdown_logging()
 
 app.add_middleware(
     CORSMiddleware,
@@ -50,33 +63,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-controller = MotorController(motor_config=config.motors)
-kinematics_solver = KinematicsSolver()
-tension_service = TensionService(controller)
+registry = RigRegistry()
 
-@app.post("/calibrate")
-async def calibrate(request: MoveRequest):
-    """Endpoint to calibrate the current position of the microphone."""
+def get_rig(rig_id: str = DEFAULT_RIG) -> Rig:
+    """Resolves the rig for a request; routes without /rigs/{rig_id} use the default rig."""
     try:
-        kinematics_solver.calibrate_position(request.x, request.y, request.z)
-        return {"status": "calibrated", "position": request.model_dump()}
+        return registry.get(rig_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+# Per-rig endpoints, served both at the top level (default rig) and under /rigs/{rig_id}.
+router = APIRouter()
+
+@router.post("/calibrate")
+async def calibrate(request: MoveRequest, rig: Rig = Depends(get_rig)):
+    """
+    Endpoint to calibrate the current position of the microphone.
+    Also records the drives' position counters as the reference for /position.
+    Runs between moves, once the move in flight has finished.
+    """
+    try:
+        reference = await rig.scheduler.calibrate(request.x, request.y, request.z)
+        return {"status": "calibrated", "position": request.model_dump(), "position_reference": reference}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/move")
-async def move(request: MoveRequest):
-    """Endpoint to move microphone to specified XYZ position."""
+@router.post("/move")
+async def move(request: MoveRequest, wait: bool = False, straight: bool = False, rig: Rig = Depends(get_rig)):
+    """
+    Endpoint to move microphone to specified XYZ position.
+    Reports the setup/trigger phase times and the trigger write/ack skew.
+    With wait=true, responds once every drive has finished moving and reports the measured move time.
+    With straight=true, the move is split into segments that keep the mic on the straight line;
+    the response then comes once the last segment has finished, with per-segment timings.
+    Targets arriving while a move is in flight are coalesced: only the newest
+    one is executed and the others return status "superseded".
+    """
     try:
-        command_map = kinematics_solver.solve(request.x, request.y, request.z)
-        if command_map:
-            await controller.execute_movement_async(command_map)
-            return {
-                "status": "success",
-                "position": request.model_dump()
+        if straight:
+            status, segments = await rig.scheduler.submit_path([[request.x, request.y, request.z]], straight=True)
+            return {"status": status, "position": request.model_dump(), "segments": segments or []}
+
+        status, motion = await rig.scheduler.submit(request.x, request.y, request.z)
+        if motion:
+            result = {
+                "status": status,
+                "position": request.model_dump(),
+                "predicted_ms": motion.predicted_ms,
+                **motion.timings,
             }
+            if wait:
+                result.update(await motion)
+            return result
         else:
             return {
-                "status": "error",
+                "status": status,
                 "position": request.model_dump()
             }
     except ValueError as e:
@@ -85,80 +126,207 @@ async def move(request: MoveRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/emergency-stop")
-async def emergency_stop():
+@router.post("/move/batch")
+async def move_batch(request: MoveBatchRequest, rig: Rig = Depends(get_rig)):
+    """
+    Moves through a list of waypoints back to back. All waypoints are
+    validated and solved before the first move; each segment's setup
+    overlaps the previous segment's motion. Responds when the tour is done.
+    With "straight": true, each leg follows the straight line between waypoints.
+    """
+    try:
+        waypoints = [[p.x, p.y, p.z] for p in request.waypoints]
+        status, segments = await rig.scheduler.submit_path(waypoints, straight=request.straight)
+        return {"status": status, "segments": segments or []}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/position")
+async def get_position(rig: Rig = Depends(get_rig)):
+    """
+    Where the mic actually is, reconstructed from the drives' position
+    counters (forward kinematics). Reflects partial moves, stops and tension
+    corrections; drift_in is the distance from the last planned target.
+    """
+    try:
+        counts = await rig.controller.read_positions_async()
+        position, residual = rig.solver.forward_counts([counts[name] for name in MOTOR_NAMES])
+        planned = rig.solver.last_position
+        return {
+            "position": dict(zip("xyz", position)),
+            "residual_in": residual,
+            "planned_position": dict(zip("xyz", planned)) if planned else None,
+            "drift_in": math.dist(position, planned) if planned else None,
+            "counts": counts,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/feasibility")
+def get_feasibility(x: float, y: float, z: float, rig: Rig = Depends(get_rig)):
+    """
+    Whether the mic can be held at (x, y, z) with every cable taut and within
+    its limit, the tension margin (lbf) and the cable tensions achieving it.
+    """
+    tension = rig.settings.tension
+    margin, tensions = tension_margin(
+        rig.solver.anchors, [x, y, z], tension.payload_lbf, tension.min_cable_tension_lbf, tension.max_cable_tension_lbf,
+    )
+    return {
+        "position": {"x": x, "y": y, "z": z},
+        "in_bounds": bool(rig.solver.in_bounds([x, y, z])[0]),
+        "feasible": bool(margin[0] >= tension.min_tension_margin_lbf),
+        "margin_lbf": float(margin[0]),
+        "tensions_lbf": dict(zip(MOTOR_NAMES, tensions[0].tolist())),
+        "payload_lbf": tension.payload_lbf,
+    }
+
+@router.post("/calibration/samples")
+async def add_calibration_sample(request: MoveRequest, rig: Rig = Depends(get_rig)):
+    """
+    Records a geometry calibration sample: the mic is physically at the
+    given, independently measured position. Stores the drive counters
+    (less tension corrections) and the tension voltages, if readable.
+    """
+    try:
+        counts = await rig.controller.read_positions_async()
+        readings = await rig.tension.poll_all()
+        corrections = rig.solver.corrections
+        sample = CalibrationSample(
+            position=[request.x, request.y, request.z],
+            counts=[counts[name] - correction for name, correction in zip(MOTOR_NAMES, corrections)],
+            voltages={r.motor: r.voltage for r in readings if r.tension_status != "error"},
+        )
+        rig.calibration.add(sample)
+        return {"status": "recorded", "sample": sample.model_dump(), "samples": len(rig.calibration.samples)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/calibration/samples")
+def get_calibration_samples(rig: Rig = Depends(get_rig)):
+    return {"samples": [s.model_dump() for s in rig.calibration.samples]}
+
+@router.delete("/calibration/samples")
+def clear_calibration_samples(rig: Rig = Depends(get_rig)):
+    rig.calibration.clear()
+    return {"status": "cleared"}
+
+@router.post("/calibration/fit")
+def fit_calibration(write: bool = False, rig: Rig = Depends(get_rig)):
+    """
+    Fits anchor positions and step size to the recorded samples and reports
+    the residuals before and after. With write=true the result is written
+    to .env (default rig only) and takes effect on restart.
+    """
+    try:
+        result = fit_geometry(rig.calibration.samples, rig.settings)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if write and rig.id != DEFAULT_RIG:
+        raise HTTPException(status_code=400, detail="Write-back is only supported for the default rig; set the geometry in RIGS")
+    try:
+        env = write_env(result) if write else env_lines(result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"result": result.model_dump(), "env": env, "written": write}
+
+@router.post("/emergency-stop")
+async def emergency_stop(rig: Rig = Depends(get_rig)):
     """Immediately halt all motors."""
     try:
-        await controller.emergency_stop_async()
-        return {"status": "stopped"}
+        timings = await rig.controller.emergency_stop_async()
+        return {"status": "stopped", **timings}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/motors/status")
-async def check_motors():
-    """Check if all 4 motors are reachable."""
-    results = await controller.check_connections_async()
+@router.get("/motors/status")
+async def check_motors(rig: Rig = Depends(get_rig)):
+    """Report whether all 4 motors are reachable, from the background watchdog's status table."""
+    details = rig.controller.connection_status()
+    results = {name: entry.status for name, entry in details.items()}
     all_connected = all(status == "connected" for status in results.values())
-    return {"motors": results, "all_connected": all_connected}
+    return {
+        "motors": results,
+        "all_connected": all_connected,
+        "details": {name: entry.model_dump() for name, entry in details.items()},
+    }
 
-@app.get("/tension")
-async def get_all_tension():
+@router.get("/tension")
+async def get_all_tension(rig: Rig = Depends(get_rig)):
     """Poll tension across all supported motors."""
     try:
-        return await tension_service.poll_all()
+        return await rig.tension.poll_all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/tension/{motor}")
-async def get_single_tension(motor: str):
+@router.get("/tension/{motor}")
+async def get_single_tension(motor: str, rig: Rig = Depends(get_rig)):
     """Poll tension for a specific motor."""
     try:
-        return await tension_service.poll_single(motor)
+        return await rig.tension.poll_single(motor)
     except ValueError as e:
          raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/tension/fix")
-async def fix_tension(request: TensionFixRequest):
+@router.post("/tension/fix")
+async def fix_tension(request: TensionFixRequest, rig: Rig = Depends(get_rig)):
     """Admin endpoint to manually loosen or tighten a single cable."""
     try:
-        return await tension_service.fix_tension(request.motor, request.direction)
+        return await rig.tension.fix_tension(request.motor, request.direction)
     except ValueError as e:
          raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/tension/auto-fix")
-async def auto_fix_tension(max_iterations: int = 5):
+@router.post("/tension/auto-fix")
+async def auto_fix_tension(max_iterations: int = 5, rig: Rig = Depends(get_rig)):
     """Automatically nudges all out-of-range cables"""
     try:
-        return await tension_service.auto_fix_all(max_iterations=max_iterations)
+        return await rig.tension.auto_fix_all(max_iterations=max_iterations)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/health")
-def health():
-    return {"status": "healthy"}
-
-@app.get("/config")
-def get_config():
+@router.get("/config")
+def get_config(rig: Rig = Depends(get_rig)):
     """Return current system configuration including geometry."""
     return {
         "geometry": {
-            "width": config.geometry.width_in,
-            "height": config.geometry.height_in,
-            "z_height": config.geometry.z_height_in,
+            "width": rig.settings.geometry.width_in,
+            "height": rig.settings.geometry.height_in,
+            "z_height": rig.settings.geometry.z_height_in,
             "motors": {
-                "m1": config.geometry.m1,
-                "m2": config.geometry.m2,
-                "m3": config.geometry.m3,
-                "m4": config.geometry.m4
+                "m1": rig.settings.geometry.m1,
+                "m2": rig.settings.geometry.m2,
+                "m3": rig.settings.geometry.m3,
+                "m4": rig.settings.geometry.m4
             }
         }
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus-style per-drive latency, error and move-phase metrics."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health")
+def health():
+    return {"status": "healthy"}
+
+@app.get("/rigs")
+def list_rigs():
+    """Ids of all configured rigs; each is served under /rigs/{rig_id}/..."""
+    return {"rigs": list(registry.rigs)}
+
+app.include_router(router)
+app.include_router(router, prefix="/rigs/{rig_id}")
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,11 +1,20 @@
-from .motor_controller import MotorController
-from .commands import CommandSequence
-from .motor import AsyncMotor
+from .motor_controller import MotorController, MoveCancelledError
+from .commands import CommandSequence, Command
+from .motor import AsyncMotor, PipelineError
+from .motion import MotionHandle
+from .udp_motor import AsyncUdpMotor
+from .connection_pool import ConnectionPool
 from .config import config
 
 __all__ = [
     "MotorController",
+    "MoveCancelledError",
     "CommandSequence",
+    "Command",
     "AsyncMotor",
+    "PipelineError",
+    "MotionHandle",
+    "AsyncUdpMotor",
+    "ConnectionPool",
     "config",
 ]
\ No newline at end of file
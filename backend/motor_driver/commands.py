@@ -2,71 +2,124 @@
 Module defining SCL command templates and command sequence builders.
 """
 
-from typing import List
+from typing import Dict, List, Tuple
+from .config import config
+
+_HEADER = config.protocol.header_bytes
+_TERMINATOR = config.protocol.terminator_byte
+_ENCODING = config.protocol.encoding
+_PARAM_CACHE_SIZE = 4096
+
+
+class Command(str):
+    """
+    An SCL command string that carries its complete eSCL packet.
+    Behaves like the plain command text everywhere else, but AsyncMotor
+    sends `packet` directly instead of re-encoding the string per send.
+    """
+
+    packet: bytes
+
+    def __new__(cls, text: str):
+        obj = super().__new__(cls, text)
+        obj.packet = _HEADER + text.encode(_ENCODING) + _TERMINATOR
+        return obj
+
+
+_param_cache: Dict[Tuple[str, type, object], Command] = {}
+
+
+def parameterised(prefix: str, value) -> Command:
+    """
+    Returns the compiled command for a register write such as VE2.5.
+    Values repeat heavily across moves and polls, so compiled commands are
+    cached; the cache is simply reset when it reaches its size limit.
+    """
+    key = (prefix, type(value), value)
+    cmd = _param_cache.get(key)
+    if cmd is None:
+        if len(_param_cache) >= _PARAM_CACHE_SIZE:
+            _param_cache.clear()
+        cmd = Command(f"{prefix}{value}")
+        _param_cache[key] = cmd
+    return cmd
+
 
 class SCLCommands:
-    """Class containing SCL command templates."""
-
-    ACCELERATION = "AC"
-    DECELERATION = "DE"
-    VELOCITY = "VE"
-    DISTANCE = "DI"
-    FEED_POSITION = "FP"
-    FEED_LENGTH = "FL"
-    MOTION_ENABLED = "ME"
-    REQUEST_STATUS = "RS"
-    STOP = "ST"
-    ALARM_RESET = "AR"
-    ALARM_CODE = "AL"
-    ANALOG_SOURCE = "AS3"
-    INPUT_FORMAT_DECIMAL = "IFD"
-    ANALOG_INPUT = "IA"
+    """Class containing SCL command templates, compiled once at import."""
+
+    ACCELERATION = Command("AC")
+    DECELERATION = Command("DE")
+    VELOCITY = Command("VE")
+    DISTANCE = Command("DI")
+    FEED_POSITION = Command("FP")
+    FEED_LENGTH = Command("FL")
+    MOTION_ENABLED = Command("ME")
+    REQUEST_STATUS = Command("RS")
+    STOP = Command("ST")
+    ALARM_RESET = Command("AR")
+    ALARM_CODE = Command("AL")
+    ANALOG_SOURCE = Command("AS3")
+    INPUT_FORMAT_DECIMAL = Command("IFD")
+    ANALOG_INPUT = Command("IA")
+    INPUT_FORMAT_HEX = Command("IFH")
+    IMMEDIATE_POSITION = Command("IP")
 
 
 class CommandSequence:
     """Build command sequences from high-level parameters."""
 
     @staticmethod
-    def move_absolute(position: float, speed: float, accel: float, decel: float) -> List[str]:
+    def move_absolute(position: float, speed: float, accel: float, decel: float) -> List[Command]:
         """Generates a command list for an absolute move."""
+        speed = round(speed, 4)
+        accel = round(accel, 3)
+        decel = round(decel, 3)
         return [
             SCLCommands.MOTION_ENABLED,
-            f"{SCLCommands.ACCELERATION}{accel}",
-            f"{SCLCommands.DECELERATION}{decel}",
-            f"{SCLCommands.VELOCITY}{speed}",
-            f"{SCLCommands.DISTANCE}{position}",
+            parameterised(SCLCommands.ACCELERATION, accel),
+            parameterised(SCLCommands.DECELERATION, decel),
+            parameterised(SCLCommands.VELOCITY, speed),
+            parameterised(SCLCommands.DISTANCE, position),
             SCLCommands.FEED_POSITION
         ]
 
     @staticmethod
-    def move_relative(position: float, speed: float, accel: float, decel: float) -> List[str]:
+    def move_relative(position: float, speed: float, accel: float, decel: float) -> List[Command]:
         """Generates a command list for a relative move."""
         speed = round(speed, 4)
+        accel = round(accel, 3)
+        decel = round(decel, 3)
         return [
             SCLCommands.MOTION_ENABLED,
-            f"{SCLCommands.ACCELERATION}{accel}",
-            f"{SCLCommands.DECELERATION}{decel}",
-            f"{SCLCommands.VELOCITY}{speed}",
-            f"{SCLCommands.DISTANCE}{position}",
+            parameterised(SCLCommands.ACCELERATION, accel),
+            parameterised(SCLCommands.DECELERATION, decel),
+            parameterised(SCLCommands.VELOCITY, speed),
+            parameterised(SCLCommands.DISTANCE, position),
             SCLCommands.FEED_LENGTH
         ]
 
     @staticmethod
-    def get_status() -> str:
+    def get_status() -> Command:
         """Gets the drive status."""
         return SCLCommands.REQUEST_STATUS
 
     @staticmethod
-    def stop() -> str:
+    def stop() -> Command:
         """Stops the drive."""
         return SCLCommands.STOP
 
     @staticmethod
-    def configure_tension_sensor() -> List[str]:
+    def configure_tension_sensor() -> List[Command]:
         """Commands to set analog source to 3 for single ended 0-5V and return format to decimal."""
         return [SCLCommands.ANALOG_SOURCE, SCLCommands.INPUT_FORMAT_DECIMAL]
 
     @staticmethod
-    def read_analog_input() -> str:
+    def read_analog_input() -> Command:
         """Command to read analog input depending on previous AS command."""
         return SCLCommands.ANALOG_INPUT
+
+    @staticmethod
+    def read_position() -> List[Command]:
+        """Commands to read the drive's absolute position counter (steps) in decimal."""
+        return [SCLCommands.INPUT_FORMAT_DECIMAL, SCLCommands.IMMEDIATE_POSITION]
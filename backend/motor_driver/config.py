@@ -1,10 +1,12 @@
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
-from typing import Dict, List
+from typing import Dict, List, Literal, Optional
 
 class MotorSettings(BaseModel):
     ip: str
     port: int
+    transport: Literal["tcp", "udp"] = "tcp"
+    udp_port: int = 7775
 
 class ProtocolSettings(BaseModel):
     header_bytes: bytes = b'\x00\x07'
@@ -14,6 +16,19 @@ class ProtocolSettings(BaseModel):
 class MotionSettings(BaseModel):
     socket_timeout: float = 5.0
     recv_buffer_size: int = 1024
+    health_check_interval: float = 10.0
+    reconnect_attempts: int = 2
+    pipeline_commands: bool = True
+    udp_retry_timeout: float = 0.05
+    udp_retries: int = 3
+    steps_per_rev: int = 20000
+    heartbeat_interval: float = 2.0
+    sync_trigger: bool = True
+    shadow_registers: bool = True
+    completion_poll_interval: float = 0.01
+    completion_poll_max_interval: float = 0.1
+    completion_timeout: float = 5.0
+    stop_timeout: float = 0.5
 
 class GeometrySettings(BaseModel):
     m1: List[float] = [77.16, 81.48, 95.16]    
@@ -26,6 +41,14 @@ class GeometrySettings(BaseModel):
 
 class KinematicSettings(BaseModel):
     kinematic_step_size: float = 0.00064316 
+    path_tolerance_in: float = 0.05
+    max_path_segments: int = 64
+    absolute_moves: bool = True
+    calibration_dir: str = "calibration"
+    grid_enabled: bool = False
+    grid_spacing_in: float = 1.0
+    grid_tolerance_in: float = 0.01
+    grid_cache_dir: str = "workspace_cache"
 
 class TensionSettings(BaseModel):
     low_voltage_threshold: float = 0.55
@@ -35,6 +58,26 @@ class TensionSettings(BaseModel):
     correction_steps: int = 50
     sensor_equipped_motors: List[str] = ["motor2", "motor3", "motor4"]
     inverted_tension_motors: List[str] = ["motor2"]
+    feasibility_check: bool = True
+    payload_lbf: float = 2.0
+    min_cable_tension_lbf: float = 0.1
+    max_cable_tension_lbf: float = 50.0
+    min_tension_margin_lbf: float = 0.0
+
+class LoggingSettings(BaseModel):
+    level: str = "INFO"
+    levels: Dict[str, str] = {"motor": "WARNING"}
+    format: str = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+class RigSettings(BaseModel):
+    """Everything that differs between rigs: drive addresses, geometry, tension and move defaults."""
+    motors: Dict[str, MotorSettings]
+    geometry: GeometrySettings = GeometrySettings()
+    kinematics: KinematicSettings = KinematicSettings()
+    tension: TensionSettings = TensionSettings()
+    default_speed: float = 5.0
+    default_accel: float = 100.0
+    default_decel: float = 100.0
 
 class MotorConfig(BaseSettings):
     motor1_ip: str = "192.168.1.10"
@@ -42,6 +85,19 @@ class MotorConfig(BaseSettings):
     motor3_ip: str = "192.168.1.30"
     motor4_ip: str = "192.168.0.40"
     motor_port: int = 7776
+    motor_udp_port: int = 7775
+    motor1_port: Optional[int] = None
+    motor2_port: Optional[int] = None
+    motor3_port: Optional[int] = None
+    motor4_port: Optional[int] = None
+    motor1_udp_port: Optional[int] = None
+    motor2_udp_port: Optional[int] = None
+    motor3_udp_port: Optional[int] = None
+    motor4_udp_port: Optional[int] = None
+    motor1_transport: Literal["tcp", "udp"] = "tcp"
+    motor2_transport: Literal["tcp", "udp"] = "tcp"
+    motor3_transport: Literal["tcp", "udp"] = "tcp"
+    motor4_transport: Literal["tcp", "udp"] = "tcp"
     default_speed: float = 5.0
     default_accel: float = 100.0
     default_decel: float = 100.0
@@ -51,16 +107,39 @@ class MotorConfig(BaseSettings):
     geometry: GeometrySettings = GeometrySettings()
     kinematics: KinematicSettings = KinematicSettings()
     tension: TensionSettings = TensionSettings()
+    logging: LoggingSettings = LoggingSettings()
+    rigs: Dict[str, RigSettings] = {}
     
     @property
     def motors(self) -> Dict[str, MotorSettings]:
         return {
-            "motor1": MotorSettings(ip=self.motor1_ip, port=self.motor_port),
-            "motor2": MotorSettings(ip=self.motor2_ip, port=self.motor_port),
-            "motor3": MotorSettings(ip=self.motor3_ip, port=self.motor_port),
-            "motor4": MotorSettings(ip=self.motor4_ip, port=self.motor_port),
+            f"motor{i}": MotorSettings(
+                ip=getattr(self, f"motor{i}_ip"),
+                port=getattr(self, f"motor{i}_port") or self.motor_port,
+                transport=getattr(self, f"motor{i}_transport"),
+                udp_port=getattr(self, f"motor{i}_udp_port") or self.motor_udp_port,
+            )
+            for i in range(1, 5)
         }
 
+    @property
+    def default_rig(self) -> RigSettings:
+        """The rig described by the top-level MOTORn_* / GEOMETRY__* / TENSION__* settings."""
+        return RigSettings(
+            motors=self.motors,
+            geometry=self.geometry,
+            kinematics=self.kinematics,
+            tension=self.tension,
+            default_speed=self.default_speed,
+            default_accel=self.default_accel,
+            default_decel=self.default_decel,
+        )
+
+    @property
+    def all_rigs(self) -> Dict[str, RigSettings]:
+        """The default rig plus any extra rigs from RIGS."""
+        return {"default": self.default_rig, **self.rigs}
+
     class Config:
         env_file = ".env"
         env_nested_delimiter = "__"
@@ -0,0 +1,166 @@
+"""
+Connection pool keeping one long-lived eSCL connection per drive.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from .motor import AsyncMotor
+from .udp_motor import AsyncUdpMotor
+from .config import MotorSettings, config
+from .commands import CommandSequence
+from .logging_setup import get_logger
+from .metrics import metrics
+
+logger = get_logger("pool")
+
+
+class ConnectionPool:
+    """
+    Holds one persistent AsyncMotor per drive.
+
+    Each drive has its own lock, so concurrent coroutines share a connection
+    one command list at a time. Idle connections are health-checked with RS
+    before reuse and re-opened when they have gone stale.
+    """
+
+    def __init__(self, motor_config: Dict[str, MotorSettings], rig: Optional[str] = None):
+        self.motor_config = motor_config
+        self.rig = rig
+        self._motors: Dict[str, AsyncMotor] = {}
+        self._locks: Dict[str, asyncio.Lock] = {name: asyncio.Lock() for name in motor_config}
+        self._last_used: Dict[str, float] = {}
+
+    def _get_settings(self, motor_name: str) -> MotorSettings:
+        settings = self.motor_config.get(motor_name)
+        if not settings:
+            raise ValueError(f"Motor {motor_name} not configured")
+        return settings
+
+    async def _open(self, motor_name: str) -> AsyncMotor:
+        """Opens a fresh connection, retrying up to the configured attempts."""
+        settings = self._get_settings(motor_name)
+        attempts = max(1, config.motion.reconnect_attempts)
+        last_error: Exception = ConnectionError(f"Could not connect to {motor_name}")
+
+        for attempt in range(attempts):
+            if settings.transport == "udp":
+                motor = AsyncUdpMotor(name=motor_name, ip=settings.ip, port=settings.udp_port, rig=self.rig)
+            else:
+                motor = AsyncMotor(name=motor_name, ip=settings.ip, port=settings.port, rig=self.rig)
+            try:
+                await motor.connect()
+                self._motors[motor_name] = motor
+                self._last_used[motor_name] = time.monotonic()
+                return motor
+            except Exception as e:
+                last_error = e
+                logger.warning("%s: connect attempt %d/%d failed: %s", motor_name, attempt + 1, attempts, e)
+
+        raise last_error
+
+    async def _is_healthy(self, motor_name: str, motor: AsyncMotor) -> bool:
+        """Checks a pooled connection, probing with RS if it has been idle."""
+        if not motor.is_connected:
+            return False
+
+        idle = time.monotonic() - self._last_used.get(motor_name, 0.0)
+        if idle < config.motion.health_check_interval:
+            return True
+
+        return await motor.send_command(CommandSequence.get_status()) is not None
+
+    async def _ensure_connected(self, motor_name: str) -> AsyncMotor:
+        motor = self._motors.get(motor_name)
+        if motor and await self._is_healthy(motor_name, motor):
+            return motor
+
+        if motor:
+            logger.info("%s: connection stale, reconnecting", motor_name)
+            metrics.inc("automic_reconnects_total", motor=motor_name, **({"rig": self.rig} if self.rig else {}))
+            await self._discard(motor_name)
+        return await self._open(motor_name)
+
+    async def _ensure_all_connected(self, names: List[str]) -> List[AsyncMotor]:
+        """
+        _ensure_connected for several drives concurrently. Every connect has
+        finished (or been cancelled) before this returns or raises, so none
+        outlives the caller's locks; the first failure is then raised.
+        """
+        tasks = [asyncio.create_task(self._ensure_connected(name)) for name in names]
+        try:
+            await asyncio.wait(tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return [task.result() for task in tasks]
+
+    async def _discard(self, motor_name: str) -> None:
+        motor = self._motors.pop(motor_name, None)
+        if motor:
+            await motor.close()
+
+    @asynccontextmanager
+    async def acquire(self, motor_name: str) -> AsyncIterator[AsyncMotor]:
+        """
+        Yields the connected motor for exclusive use by the caller.
+        The connection is dropped if the caller raises, since the drive may
+        still owe a response that would desync the next command.
+        """
+        self._get_settings(motor_name)
+        lock = self._locks.setdefault(motor_name, asyncio.Lock())
+
+        async with lock:
+            motor = await self._ensure_connected(motor_name)
+            try:
+                yield motor
+            except BaseException:
+                await self._discard(motor_name)
+                raise
+            self._last_used[motor_name] = time.monotonic()
+
+    @asynccontextmanager
+    async def acquire_many(self, motor_names: List[str]) -> AsyncIterator[Dict[str, AsyncMotor]]:
+        """
+        Yields connected motors for several drives at once, held together.
+        Locks are taken in sorted order so concurrent callers cannot deadlock,
+        and missing connections are opened concurrently.
+        """
+        names = sorted(set(motor_names))
+        for name in names:
+            self._get_settings(name)
+
+        held: List[asyncio.Lock] = []
+        try:
+            for name in names:
+                lock = self._locks.setdefault(name, asyncio.Lock())
+                await lock.acquire()
+                held.append(lock)
+
+            connected = await self._ensure_all_connected(names)
+            motors = dict(zip(names, connected))
+            try:
+                yield motors
+            except BaseException:
+                for name in names:
+                    await self._discard(name)
+                raise
+            now = time.monotonic()
+            for name in names:
+                self._last_used[name] = now
+        finally:
+            for lock in held:
+                lock.release()
+
+    async def invalidate(self, motor_name: str) -> None:
+        """Forces the next acquire of this drive to reconnect."""
+        async with self._locks.setdefault(motor_name, asyncio.Lock()):
+            await self._discard(motor_name)
+
+    async def close_all(self) -> None:
+        """Closes every pooled connection."""
+        for name in list(self._motors.keys()):
+            await self._discard(name)
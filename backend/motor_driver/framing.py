@@ -0,0 +1,184 @@
+"""
+Streaming eSCL frame decoding on top of a reusable receive buffer.
+"""
+
+import asyncio
+from typing import List, Optional
+
+
+class FrameDecoder:
+    """
+    Splits a byte stream into eSCL response frames.
+
+    Incoming bytes are written straight into a preallocated bytearray (see
+    get_buffer), frames are located with bytearray.find and decoded from
+    memoryview slices, so no intermediate bytes objects are created per read.
+    A frame ends at the terminator; a leading header and any stray line feeds
+    left over from drives that answer with CR/LF are skipped. Some drives
+    answer a query with an ack before the data ("+\r\n24567\r\n"); a bare
+    "+" followed by a line feed and another frame in the same read is one
+    reply, the data.
+    """
+
+    _SKIP = b"\n "
+    _ACK = "+"
+
+    def __init__(self, header: bytes, terminator: bytes, encoding: str, size: int = 1024):
+        self.header = header
+        self.terminator = terminator
+        self.encoding = encoding
+        self._buffer = bytearray(max(size, 64))
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+
+    def get_buffer(self, sizehint: int = -1) -> memoryview:
+        """Returns writable space at the end of the buffer, compacting or growing it if needed."""
+        wanted = max(sizehint, 64)
+        if len(self._buffer) - self._end < wanted:
+            pending = self._end - self._start
+            if pending + wanted > len(self._buffer):
+                grown = bytearray(max(len(self._buffer) * 2, pending + wanted))
+                grown[:pending] = self._view[self._start:self._end]
+                self._buffer = grown
+                self._view = memoryview(grown)
+            elif pending:
+                self._buffer[:pending] = self._buffer[self._start:self._end]
+            self._start = 0
+            self._end = pending
+        return self._view[self._end:]
+
+    def buffer_updated(self, nbytes: int) -> List[str]:
+        """Consumes nbytes written into the last get_buffer() and returns completed frames."""
+        self._end += nbytes
+        frames = []
+        buf = self._buffer
+        acked = False
+
+        while True:
+            idx = buf.find(self.terminator, self._start, self._end)
+            if idx < 0:
+                break
+
+            begin = self._start
+            while begin < idx and buf[begin] in self._SKIP:
+                begin += 1
+            if buf.startswith(self.header, begin, idx):
+                begin += len(self.header)
+
+            if begin < idx:
+                frame = str(self._view[begin:idx], self.encoding).strip()
+                if frame:
+                    if acked and buf.find(b"\n", self._start, begin) >= 0:
+                        frames[-1] = frame
+                    else:
+                        frames.append(frame)
+                    acked = frame == self._ACK
+            self._start = idx + len(self.terminator)
+
+        if self._start == self._end:
+            self._start = self._end = 0
+        return frames
+
+    def feed(self, data: bytes) -> List[str]:
+        """Copies data into the buffer and returns completed frames."""
+        target = self.get_buffer(len(data))
+        target[:len(data)] = data
+        return self.buffer_updated(len(data))
+
+    def reset(self) -> None:
+        """Drops any partially received frame."""
+        self._start = self._end = 0
+
+
+class EsclStreamProtocol(asyncio.BufferedProtocol):
+    """
+    TCP protocol that decodes eSCL frames as they arrive and queues them.
+    A None entry is queued when the connection is lost so waiters wake up.
+    """
+
+    def __init__(self, decoder: FrameDecoder):
+        self.decoder = decoder
+        self.frames: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        self.transport: Optional[asyncio.Transport] = None
+        self.connected = False
+        self._writable = asyncio.Event()
+        self._writable.set()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.connected = True
+
+    def get_buffer(self, sizehint):
+        return self.decoder.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes):
+        for frame in self.decoder.buffer_updated(nbytes):
+            self.frames.put_nowait(frame)
+
+    def eof_received(self):
+        return False
+
+    def connection_lost(self, exc):
+        self.connected = False
+        self._writable.set()
+        self.frames.put_nowait(None)
+
+    def pause_writing(self):
+        self._writable.clear()
+
+    def resume_writing(self):
+        self._writable.set()
+
+    async def drain(self) -> None:
+        """Waits until the transport's write buffer has room again."""
+        await self._writable.wait()
+
+    def discard_pending(self) -> int:
+        """Drops frames nobody is waiting for, e.g. late replies after a timeout."""
+        dropped = 0
+        while not self.frames.empty():
+            self.frames.get_nowait()
+            dropped += 1
+        return dropped
+
+
+class EsclDatagramProtocol(asyncio.DatagramProtocol):
+    """
+    UDP counterpart of EsclStreamProtocol. Each datagram is run through the
+    same FrameDecoder, so framing rules and the frame queue are shared.
+    """
+
+    def __init__(self, decoder: FrameDecoder):
+        self.decoder = decoder
+        self.frames: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.connected = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.connected = True
+
+    def datagram_received(self, data, addr):
+        self.decoder.reset()
+        for frame in self.decoder.feed(data):
+            self.frames.put_nowait(frame)
+
+    def error_received(self, exc):
+        pass
+
+    def connection_lost(self, exc):
+        self.connected = False
+        self.frames.put_nowait(None)
+
+    async def drain(self) -> None:
+        """Datagrams are never buffered by the transport."""
+        return None
+
+    def discard_pending(self) -> int:
+        """Drops frames nobody is waiting for, e.g. duplicated replies."""
+        dropped = 0
+        while not self.frames.empty():
+            self.frames.get_nowait()
+            dropped += 1
+        return dropped
@@ -0,0 +1,76 @@
+"""
+Structured, queue-backed logging for the backend.
+
+Every subsystem logs through `get_logger(<subsystem>)` (automic.motor,
+automic.controller, ...), each with its own level from LoggingSettings.
+Handlers never run on the event loop: records are put on a queue with their
+arguments merged into the message and a QueueListener thread formats and
+writes them. Disabled levels cost a single
+cached level check at the call site.
+"""
+
+import copy
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional
+
+from .config import LoggingSettings, config
+
+ROOT_LOGGER = "automic"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that merges the arguments into the message, as the stdlib
+    one does, since they may change before the listener gets to them, but
+    leaves exception and stack formatting to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    """Returns the logger for a backend subsystem, e.g. get_logger("motor")."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{subsystem}")
+
+
+def setup_logging(settings: Optional[LoggingSettings] = None) -> None:
+    """Routes all automic.* loggers through a background queue listener."""
+    global _listener
+    settings = settings or config.logging
+
+    if _listener is not None:
+        shutdown_logging()
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(settings.level.upper())
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    for subsystem, level in settings.levels.items():
+        get_logger(subsystem).setLevel(level.upper())
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(logging.Formatter(settings.format))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(_DeferredQueueHandler(records))
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
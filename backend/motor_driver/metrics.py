@@ -0,0 +1,114 @@
+"""
+In-process latency histograms and counters with Prometheus text exposition.
+"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+LATENCY_BUCKETS = (
+    0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Bucket counts live in a list preallocated at
+    creation, so observe() is a bisect and three additions.
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Iterable[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Holds labelled histograms and counters and renders them for /metrics."""
+
+    def __init__(self):
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._help[name] = (kind, help_text)
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        """Returns (creating on first use) the histogram for a label set. Callers on hot paths should keep the result."""
+        series = self._histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = Histogram()
+        return hist
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        series = self._counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + amount
+
+    def counter_value(self, name: str, **labels: str) -> float:
+        return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def reset(self) -> None:
+        self._histograms.clear()
+        self._counters.clear()
+
+    @staticmethod
+    def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = labels + extra
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def _header(self, lines: List[str], name: str, default_kind: str) -> None:
+        kind, help_text = self._help.get(name, (default_kind, name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+
+        for name, series in sorted(self._counters.items()):
+            self._header(lines, name, "counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{self._format_labels(labels)} {value:g}")
+
+        for name, series in sorted(self._histograms.items()):
+            self._header(lines, name, "histogram")
+            for labels, hist in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(hist.bounds, hist.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{self._format_labels(labels, (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{name}_bucket{self._format_labels(labels, (('le', '+Inf'),))} {hist.count}")
+                lines.append(f"{name}_sum{self._format_labels(labels)} {hist.sum:.6f}")
+                lines.append(f"{name}_count{self._format_labels(labels)} {hist.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+metrics.describe("automic_command_rtt_seconds", "histogram", "Round-trip time of eSCL commands per motor and command type.")
+metrics.describe("automic_command_timeouts_total", "counter", "eSCL commands that got no reply within the timeout.")
+metrics.describe("automic_command_rejected_total", "counter", "eSCL commands the drive answered with '?'.")
+metrics.describe("automic_connection_failures_total", "counter", "Failed attempts to open a drive connection.")
+metrics.describe("automic_reconnects_total", "counter", "Pooled connections dropped and re-opened.")
+metrics.describe("automic_udp_retransmits_total", "counter", "UDP requests sent again after a reply timeout.")
+metrics.describe("automic_move_phase_seconds", "histogram", "Duration of each execute_movement_async phase (motion: trigger to all drives at rest).")
+metrics.describe("automic_trigger_skew_seconds", "histogram", "Spread between the first and last drive in a synchronized trigger (write or ack).")
+metrics.describe("automic_commands_skipped_total", "counter", "Register writes skipped because the drive already holds the value.")
+metrics.describe("automic_stop_latency_seconds", "histogram", "Time from emergency-stop request to the last drive acknowledging ST.")
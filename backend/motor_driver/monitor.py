@@ -0,0 +1,93 @@
+"""
+Background connection watchdog keeping a live per-drive status table.
+"""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Dict, Literal, Optional
+
+from pydantic import BaseModel
+
+from .config import config
+from .commands import CommandSequence
+from .logging_setup import get_logger
+
+if TYPE_CHECKING:
+    from .motor_controller import MotorController
+
+logger = get_logger("monitor")
+
+
+class DriveStatus(BaseModel):
+    status: Literal["connected", "disconnected", "unknown"] = "unknown"
+    last_seen: Optional[float] = None
+    rtt_ms: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+class ConnectionMonitor:
+    """
+    Tracks drive reachability without probing on every status request.
+
+    Normal traffic through MotorController.execute_async reports its outcome
+    here. Drives that have been quiet for heartbeat_interval get an RS probe
+    from a background task, so /motors/status can answer from memory.
+    """
+
+    def __init__(self, controller: "MotorController"):
+        self.controller = controller
+        self.interval = config.motion.heartbeat_interval
+        self.table: Dict[str, DriveStatus] = {name: DriveStatus() for name in controller.motor_config}
+        self._last_activity: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record_success(self, motor_name: str, rtt: Optional[float] = None) -> None:
+        entry = self.table.setdefault(motor_name, DriveStatus())
+        entry.status = "connected"
+        entry.last_seen = time.time()
+        entry.last_error = None
+        if rtt is not None:
+            entry.rtt_ms = rtt * 1000
+        self._last_activity[motor_name] = time.monotonic()
+
+    def record_failure(self, motor_name: str, error: Exception) -> None:
+        entry = self.table.setdefault(motor_name, DriveStatus())
+        if entry.status != "disconnected":
+            logger.warning("%s marked disconnected: %s", motor_name, error)
+        entry.status = "disconnected"
+        entry.last_error = str(error)
+        self._last_activity[motor_name] = time.monotonic()
+
+    def snapshot(self) -> Dict[str, DriveStatus]:
+        return {name: entry.model_copy() for name, entry in self.table.items()}
+
+    async def _probe(self, motor_name: str) -> None:
+        try:
+            await self.controller.execute_async(motor_name, [CommandSequence.get_status()], require_response=True)
+        except Exception:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            due = [
+                name for name in self.controller.motor_config
+                if now - self._last_activity.get(name, 0.0) >= self.interval
+            ]
+            if due:
+                await asyncio.gather(*(self._probe(name) for name in due))
+            await asyncio.sleep(self.interval / 2)
+
+    def start(self) -> None:
+        """Starts the heartbeat task on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,189 @@
+"""
+Move-completion tracking for triggered multi-motor moves.
+"""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .config import config
+from .commands import CommandSequence, SCLCommands
+from .logging_setup import get_logger
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    from .motor_controller import MotorController
+
+logger = get_logger("motion")
+
+# RS status flags meaning the shaft is still (or about to stop) moving: motor moving,
+# homing, jogging, motion in progress, stopping.
+_MOVING_FLAGS = frozenset("FHJMS")
+# Alarm and drive fault.
+_FAULT_FLAGS = frozenset("AE")
+
+# Smallest VE (rev/s) and AC/DE (rev/s²) the drives accept.
+MIN_VELOCITY = 0.0042
+MIN_ACCEL = 0.167
+
+
+def profile_duration(steps, velocity: float, accel: float, decel: float, steps_per_rev: Optional[int] = None):
+    """
+    Seconds a trapezoidal (or, for short moves, triangular) move of `steps`
+    takes with the given VE (rev/s), AC and DE (rev/s²). `steps` may be an
+    array, in which case so is the result.
+    """
+    steps_per_rev = steps_per_rev or config.motion.steps_per_rev
+    distance = np.abs(np.asarray(steps, dtype=float)) / steps_per_rev
+    v = max(velocity, 1e-6)
+    a = max(accel, 1e-6)
+    d = max(decel, 1e-6)
+
+    ramp = v * v / (2 * a) + v * v / (2 * d)
+    # Peak velocity: v once the move is long enough to cruise, lower for a triangle.
+    peak = np.sqrt(2 * np.minimum(distance, ramp) * a * d / (a + d))
+    duration = peak / a + peak / d + np.maximum(distance - ramp, 0.0) / v
+    duration = np.where(distance > 0, duration, 0.0)
+    return float(duration) if duration.ndim == 0 else duration
+
+
+def synchronized_profiles(distances, velocity: float, accel: float, decel: float) -> Tuple[np.ndarray, Union[float, np.ndarray]]:
+    """
+    Per-motor (VE, AC, DE) for moves of the given distances (revs) that all
+    start and finish together, and their shared duration in seconds.
+
+    The longest move gets the time-optimal trapezoid (or triangle) within
+    the velocity/accel/decel limits; every other motor uses the same accel,
+    cruise and decel times with its limits scaled by its share of that
+    distance, which keeps all of them within the limits too. Values below
+    the drives' minimums are raised to them, so only moves a thousand times
+    shorter than the longest one can finish early.
+
+    `distances` is one move's (M,) motors or an (N, M) array of moves; the
+    profiles come back as (M, 3) or (N, M, 3), the durations as a float or (N,).
+    """
+    distances = np.abs(np.asarray(distances, dtype=float))
+    longest = distances.max(axis=-1, initial=0.0)
+    ramp = velocity * velocity / (2 * accel) + velocity * velocity / (2 * decel)
+    peak = np.sqrt(2 * np.minimum(longest, ramp) * accel * decel / (accel + decel))
+
+    moving = longest > 0
+    ratio = np.divide(distances, longest[..., None], out=np.ones_like(distances), where=moving[..., None])
+    profiles = np.stack([
+        np.where(moving[..., None], np.maximum(peak[..., None] * ratio, MIN_VELOCITY), velocity),
+        np.where(moving[..., None], np.maximum(accel * ratio, MIN_ACCEL), accel),
+        np.where(moving[..., None], np.maximum(decel * ratio, MIN_ACCEL), decel),
+    ], axis=-1)
+    return profiles, profile_duration(longest, velocity, accel, decel, steps_per_rev=1)
+
+
+def predict_duration(commands: List[str]) -> Optional[float]:
+    """
+    Predicts the duration of an FL move from its setup commands.
+    Returns None for absolute (FP) moves, whose distance depends on the
+    drive's current position.
+    """
+    if SCLCommands.FEED_POSITION in commands:
+        return None
+    registers = {"VE": config.default_speed, "AC": config.default_accel, "DE": config.default_decel, "DI": 0.0}
+    for cmd in commands:
+        key = cmd[:2]
+        if key in registers and len(cmd) > 2:
+            try:
+                registers[key] = float(cmd[2:])
+            except ValueError:
+                pass
+    return profile_duration(registers["DI"], registers["VE"], registers["AC"], registers["DE"])
+
+
+class MotionHandle:
+    """
+    Awaitable completion of a triggered move.
+
+    `timings` holds the setup/trigger phase durations as soon as the move is
+    triggered. Awaiting the handle (or calling wait()) sleeps until the
+    profile predicts each drive has finished, then polls RS with a backing-off
+    interval until no drive reports motion, and returns the measured move
+    duration. Tracking starts on the first await, so a handle nobody waits on
+    costs nothing; a late await measures the first poll that saw the drives
+    at rest.
+    """
+
+    def __init__(self, controller: "MotorController", predicted: Dict[str, Optional[float]], timings: Dict[str, float], triggered_at: float):
+        self.controller = controller
+        self.predicted = predicted
+        self.timings = timings
+        self.triggered_at = triggered_at
+        self.durations: Dict[str, float] = {}
+        self.poll_interval = config.motion.completion_poll_interval
+        self.max_poll_interval = config.motion.completion_poll_max_interval
+        self.timeout = config.motion.completion_timeout
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def predicted_ms(self) -> float:
+        """Longest predicted drive move (ms); 0 when no drive could be predicted."""
+        return max((p for p in self.predicted.values() if p is not None), default=0.0) * 1000
+
+    def done(self) -> bool:
+        return self._task is not None and self._task.done()
+
+    def cancel(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def _start(self) -> asyncio.Task:
+        if self._task is None:
+            self._task = asyncio.create_task(self._track())
+            # Mark the outcome retrieved even if every waiter was cancelled.
+            self._task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._task
+
+    def __await__(self):
+        return asyncio.shield(self._start()).__await__()
+
+    async def wait(self, timeout: Optional[float] = None) -> Dict[str, float]:
+        """Waits for the move to finish; raises asyncio.TimeoutError after `timeout` seconds."""
+        return await asyncio.wait_for(asyncio.shield(self._start()), timeout)
+
+    async def _status(self, motor_name: str) -> str:
+        responses = await self.controller.execute_async(motor_name, [CommandSequence.get_status()], require_response=True)
+        response = responses[0]
+        return response.split("=", 1)[1] if "=" in response else response
+
+    async def _track(self) -> Dict[str, float]:
+        # Each drive is first polled when its profile says it should be done,
+        # then with a doubling interval while it still reports motion.
+        next_poll = {name: self.triggered_at + (p or 0.0) for name, p in self.predicted.items()}
+        interval = {name: self.poll_interval for name in self.predicted}
+        deadline = self.triggered_at + self.predicted_ms / 1000 + self.timeout
+
+        while next_poll:
+            wake = min(next_poll.values())
+            now = time.perf_counter()
+            if wake > now:
+                await asyncio.sleep(wake - now)
+                now = time.perf_counter()
+            if now > deadline:
+                raise asyncio.TimeoutError(f"Motion did not complete on {sorted(next_poll)}")
+
+            due = sorted(name for name, at in next_poll.items() if at <= now)
+            statuses = await asyncio.gather(*(self._status(name) for name in due))
+            observed = time.perf_counter()
+
+            for name, status in zip(due, statuses):
+                if _FAULT_FLAGS.intersection(status):
+                    raise RuntimeError(f"{name} faulted during motion (RS={status})")
+                if _MOVING_FLAGS.intersection(status):
+                    next_poll[name] = observed + interval[name]
+                    interval[name] = min(interval[name] * 2, self.max_poll_interval)
+                else:
+                    self.durations[name] = observed - self.triggered_at
+                    del next_poll[name]
+
+        move = max(self.durations.values(), default=0.0)
+        metrics.histogram("automic_move_phase_seconds", phase="motion", **self.controller.labels).observe(move)
+        logger.debug("Motion complete in %.1f ms (predicted %.1f ms)", move * 1000, self.predicted_ms)
+        return {"move_ms": move * 1000, "predicted_ms": self.predicted_ms}
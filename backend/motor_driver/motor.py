@@ -1,66 +1,146 @@
 import asyncio
-from typing import Optional
+import logging
+import time
+from typing import Dict, List, Optional
 from .config import config
+from .logging_setup import get_logger
+from .metrics import Histogram, metrics
+from .framing import FrameDecoder, EsclStreamProtocol
+
+logger = get_logger("motor")
+
+
+class PipelineError(Exception):
+    """Raised when a command in a pipelined batch fails or is rejected by the drive."""
+
+    def __init__(self, motor_name: str, index: int, command: str, response: Optional[str]):
+        self.motor_name = motor_name
+        self.index = index
+        self.command = command
+        self.response = response
+        reason = "no response" if response is None else f"drive replied '{response}'"
+        super().__init__(f"[{motor_name}] Command #{index} '{command}' failed: {reason}")
+
 
 class AsyncMotor:
     """
     Async communicator for Applied Motion drive using eSCL TCP protocol.
+    See AsyncUdpMotor for the UDP variant.
+    Responses are decoded by EsclStreamProtocol and consumed from its frame queue.
     """
 
-    def __init__(self, name, ip, port=7776, timeout=None):
+    def __init__(self, name, ip, port=7776, timeout=None, rig=None):
         self.name = name
         self.ip = ip
         self.port = port
         self.timeout = timeout or config.motion.socket_timeout
-        self.reader: Optional[asyncio.StreamReader] = None
-        self.writer: Optional[asyncio.StreamWriter] = None
+        self.transport: Optional[asyncio.Transport] = None
+        self.protocol: Optional[EsclStreamProtocol] = None
+        self.labels: Dict[str, str] = {"motor": name, **({"rig": rig} if rig else {})}
+        self._rtt: Dict[str, Histogram] = {}
+        self.last_rtt: Optional[float] = None
+        self._sent_at = 0.0
+        # Register writes acknowledged on this connection (MotorController's shadow cache).
+        self.registers: Dict[str, str] = {}
 
-    async def __aenter__(self):
-        """Connects to the motor asynchronously."""
+    @property
+    def is_connected(self) -> bool:
+        """True while the underlying socket is open."""
+        return (
+            self.protocol is not None
+            and self.protocol.connected
+            and not self.transport.is_closing()
+        )
+
+    def _create_protocol(self) -> EsclStreamProtocol:
+        decoder = FrameDecoder(
+            header=config.protocol.header_bytes,
+            terminator=config.protocol.terminator_byte,
+            encoding=config.protocol.encoding,
+            size=config.motion.recv_buffer_size,
+        )
+        return EsclStreamProtocol(decoder)
+
+    async def connect(self):
+        """Opens the TCP connection to the drive."""
         try:
-            future = asyncio.open_connection(self.ip, self.port)
-            self.reader, self.writer = await asyncio.wait_for(future, timeout=self.timeout)
+            loop = asyncio.get_running_loop()
+            future = loop.create_connection(self._create_protocol, self.ip, self.port)
+            self.transport, self.protocol = await asyncio.wait_for(future, timeout=self.timeout)
             return self
-        except (asyncio.TimeoutError, ConnectionRefusedError) as e:
-            self._log_error(f"Connection failed: {e}")
+        except (asyncio.TimeoutError, ConnectionRefusedError, OSError) as e:
+            metrics.inc("automic_connection_failures_total", **self.labels)
+            self._log_error("Connection failed: %s", e)
             raise e
 
+    async def close(self):
+        """Closes the TCP connection if it is open."""
+        transport = self.transport
+        self.transport = None
+        self.protocol = None
+        if transport:
+            transport.close()
+
+    async def __aenter__(self):
+        """Connects to the motor asynchronously."""
+        return await self.connect()
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Closes the connection."""
-        if self.writer:
-            self.writer.close()
-            try:
-                await self.writer.wait_closed()
-            except Exception:
-                pass
+        await self.close()
 
     def _build_packet(self, command: str) -> bytes:
-        """Builds a complete SCL packet."""
+        """Builds a complete SCL packet, reusing the precompiled one for Command objects."""
+        packet = getattr(command, "packet", None)
+        if packet is not None:
+            return packet
         header = config.protocol.header_bytes
         terminator = config.protocol.terminator_byte
         encoding = config.protocol.encoding
         packet = command.encode(encoding)
         return header + packet + terminator
 
-    def _parse_response(self, data: bytes) -> Optional[str]:
-        """Extracts and decodes the payload."""
-        if not data:
-            return None
-        header = config.protocol.header_bytes
-        terminator = config.protocol.terminator_byte
-        encoding = config.protocol.encoding
-        
-        if len(data) < len(header) + len(terminator):
-            return None
+    def _is_rejected(self, response: str) -> bool:
+        """eSCL drives answer '?' (optionally with an error code) to rejected commands."""
+        return response.startswith("?")
+
+    async def _write(self, data: bytes) -> None:
+        if not self.is_connected:
+            raise ConnectionError("Not connected")
+        self.transport.write(data)
+        await self.protocol.drain()
+
+    async def _read_frame(self) -> Optional[str]:
+        """Waits for the next decoded response frame. None means the connection closed."""
+        return await asyncio.wait_for(self.protocol.frames.get(), timeout=self.timeout)
+
+    def _discard_stale(self) -> None:
+        """Drops late replies to earlier, timed-out commands so they are not matched to new ones."""
+        dropped = self.protocol.discard_pending() if self.protocol else 0
+        if dropped:
+            self._log_error("Discarded %s stale response(s)", dropped)
+
+    def _observe(self, command: str, seconds: float) -> None:
+        """Records a command round trip, keyed by motor and two-letter SCL code."""
+        kind = command[:2]
+        hist = self._rtt.get(kind)
+        if hist is None:
+            hist = self._rtt[kind] = metrics.histogram("automic_command_rtt_seconds", **self.labels, command=kind)
+        hist.observe(seconds)
+        self.last_rtt = seconds
 
-        payload = data[len(header):-len(terminator)]
-        return payload.decode(encoding).strip()
+    def _record_failure(self, command: str, response: Optional[str]) -> None:
+        if response is None:
+            metrics.inc("automic_command_timeouts_total", **self.labels, command=command[:2])
+        else:
+            metrics.inc("automic_command_rejected_total", **self.labels, command=command[:2])
 
-    def _log_info(self, message: str):
-        print(f"[{self.name}@{self.ip}] {message}")
+    def _log_info(self, message: str, *args):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[%s@%s] " + message, self.name, self.ip, *args)
 
-    def _log_error(self, message: str):
-        print(f"[{self.name}@{self.ip}] !!! {message}")
+    def _log_error(self, message: str, *args):
+        logger.warning("[%s@%s] " + message, self.name, self.ip, *args)
 
     async def send_command(self, command: str) -> Optional[str]:
         """
@@ -71,31 +151,94 @@ class AsyncMotor:
             return None
 
         try:
-            full_packet = self._build_packet(command)
-            
-            if not self.writer:
-                raise ConnectionError("Not connected")
-
-            self.writer.write(full_packet)
-            await self.writer.drain()
-
-            data = await asyncio.wait_for(
-                self.reader.read(config.motion.recv_buffer_size), 
-                timeout=self.timeout
-            )
-            
-            response = self._parse_response(data)
-            
+            self._discard_stale()
+            started = time.perf_counter()
+            await self._write(self._build_packet(command))
+
+            response = await self._read_frame()
+
             if response is None:
-                self._log_error(f"No response for '{command}'")
+                self._log_error("No response for '%s'", command)
                 return None
 
-            self._log_info(f"Sent '{command}' -> Received: '{response}'")
+            self._observe(command, time.perf_counter() - started)
+            self._log_info("Sent '%s' -> Received: '%s'", command, response)
             return response
 
         except asyncio.TimeoutError:
-            self._log_error(f"Timeout for '{command}'")
+            self._record_failure(command, None)
+            self._log_error("Timeout for '%s'", command)
             return None
         except Exception as e:
-            self._log_error(f"Exception sending '{command}': {e}")
+            self._log_error("Exception sending '%s': %s", command, e)
             return None
+
+    async def send_pipelined(self, commands: List[str]) -> List[str]:
+        """
+        Writes every command back to back, then reads the responses in order.
+        Costs roughly one round trip for the whole list instead of one per command.
+        Raises PipelineError naming the first command that timed out or was rejected.
+        """
+        if not commands:
+            return []
+
+        self._discard_stale()
+        started = time.perf_counter()
+        await self._write(b"".join(self._build_packet(cmd) for cmd in commands))
+
+        responses = []
+        for index, cmd in enumerate(commands):
+            try:
+                response = await self._read_frame()
+            except asyncio.TimeoutError:
+                self._record_failure(cmd, None)
+                self._log_error("Timeout for '%s' (pipelined #%s)", cmd, index)
+                raise PipelineError(self.name, index, cmd, None)
+
+            if response is None or self._is_rejected(response):
+                if response is not None:
+                    self._record_failure(cmd, response)
+                self._log_error("Pipelined '%s' failed -> '%s'", cmd, response)
+                raise PipelineError(self.name, index, cmd, response)
+
+            self._observe(cmd, time.perf_counter() - started)
+            self._log_info("Sent '%s' -> Received: '%s'", cmd, response)
+            responses.append(response)
+
+        return responses
+
+    async def arm(self) -> None:
+        """Prepares the connection for write_nowait (drops stale replies)."""
+        if not self.is_connected:
+            raise ConnectionError("Not connected")
+        self._discard_stale()
+
+    def write_nowait(self, command: str) -> float:
+        """
+        Writes a command without yielding to the event loop and returns the
+        perf_counter timestamp of the write. Pair with read_reply().
+        """
+        self.transport.write(self._build_packet(command))
+        self._sent_at = time.perf_counter()
+        return self._sent_at
+
+    async def read_reply(self, command: str) -> float:
+        """
+        Waits for the reply to a command sent with write_nowait and returns its
+        arrival timestamp. Raises PipelineError on timeout or rejection.
+        """
+        try:
+            response = await self._read_frame()
+        except asyncio.TimeoutError:
+            self._record_failure(command, None)
+            raise PipelineError(self.name, 0, command, None)
+
+        received = time.perf_counter()
+        if response is None or self._is_rejected(response):
+            if response is not None:
+                self._record_failure(command, response)
+            raise PipelineError(self.name, 0, command, response)
+
+        self._observe(command, received - self._sent_at)
+        self._log_info("Sent '%s' -> Received: '%s'", command, response)
+        return received
@@ -3,44 +3,177 @@ Motor controller for coordinating multiple motors.
 """
 
 import asyncio
-from typing import Dict, List
-from .motor import AsyncMotor
-from .config import MotorSettings
+import time
+from typing import Dict, List, Optional, Set
+from .config import MotorSettings, config as driver_config
+from .connection_pool import ConnectionPool
+from .monitor import ConnectionMonitor, DriveStatus
+from .motion import MotionHandle, predict_duration
+from .stop_channel import StopChannel
+from .motor import AsyncMotor, PipelineError
 from .commands import CommandSequence, SCLCommands
+from .logging_setup import get_logger
+from .metrics import metrics
+
+logger = get_logger("controller")
+
+# Register-setting commands whose effect is fully described by their text.
+_SHADOWED_REGISTERS = frozenset(("AC", "DE", "VE", "DI", "AS", "IF"))
+# RS status flags after which the drive's state can no longer be assumed (alarm, disabled, fault).
+_FAULT_FLAGS = frozenset("ADE")
+
+
+class MoveCancelledError(RuntimeError):
+    """Raised by execute_movement_async when an emergency stop preempted the move."""
+
 
 class MotorController:
     """Coordinates execution of commands across multiple motors."""
 
-    def __init__(self, motor_config: Dict[str, MotorSettings]):
-        """Initializes the MotorController with motor configurations."""
+    def __init__(self, motor_config: Dict[str, MotorSettings], pool: Optional[ConnectionPool] = None, rig: Optional[str] = None):
+        """
+        Initializes the MotorController with motor configurations.
+        `rig` names the rig in metric labels when one process drives several.
+        """
         self.motor_config = motor_config
+        self.rig = rig
+        self.labels: Dict[str, str] = {"rig": rig} if rig else {}
+        self.pool = pool or ConnectionPool(motor_config, rig=rig)
+        self.pipeline = driver_config.motion.pipeline_commands
+        self.sync_trigger = driver_config.motion.sync_trigger
+        self.shadow_registers = driver_config.motion.shadow_registers
+        self.monitor = ConnectionMonitor(self)
+        self.stop_channel = StopChannel(motor_config, rig=rig)
+        self.stop_epoch = 0
+        self._moves: Set[asyncio.Task] = set()
+        self._stop_open: Optional[asyncio.Task] = None
+        self._stop_hist = metrics.histogram("automic_stop_latency_seconds", **self.labels)
+        self._phase_hist = {
+            phase: metrics.histogram("automic_move_phase_seconds", phase=phase, **self.labels)
+            for phase in ("setup", "trigger", "total")
+        }
+        self._skew_hist = {
+            kind: metrics.histogram("automic_trigger_skew_seconds", kind=kind, **self.labels)
+            for kind in ("write", "ack")
+        }
+
+    def start(self) -> None:
+        """Starts background tasks (connection watchdog, stop channels). Requires a running event loop."""
+        self.monitor.start()
+        self._stop_open = asyncio.create_task(self.stop_channel.open_all())
+
+    async def close(self) -> None:
+        """Stops background tasks and closes all pooled drive connections."""
+        await self.monitor.stop()
+        if self._stop_open is not None:
+            self._stop_open.cancel()
+            try:
+                await self._stop_open
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._stop_open = None
+        await self.stop_channel.close()
+        await self.pool.close_all()
+
+    def connection_status(self) -> Dict[str, DriveStatus]:
+        """Latest known status of every drive, from the watchdog's table (no I/O)."""
+        return self.monitor.snapshot()
+
+    @staticmethod
+    def _register_key(command: str) -> Optional[str]:
+        """Shadow key for a register write (e.g. 'VE' for VE2.5), or None if the command is not cached."""
+        if command == SCLCommands.MOTION_ENABLED:
+            return "ME"
+        key = command[:2]
+        if key in _SHADOWED_REGISTERS and len(command) > 2:
+            return key
+        return None
+
+    def _pending_indices(self, motor: AsyncMotor, commands: List[str]) -> List[int]:
+        """Indices of the commands that would change the drive's state."""
+        written = dict(motor.registers)
+        pending = []
+        for index, cmd in enumerate(commands):
+            key = self._register_key(cmd)
+            if key is not None and written.get(key) == cmd:
+                continue
+            if key is not None:
+                written[key] = cmd
+            pending.append(index)
+        return pending
+
+    @staticmethod
+    def _update_shadow(motor: AsyncMotor, commands: List[str], responses: List[str]) -> None:
+        for cmd, response in zip(commands, responses):
+            if motor._is_rejected(response):
+                # A rejected write left the register as it was.
+                continue
+            key = MotorController._register_key(cmd)
+            if key is not None:
+                motor.registers[key] = cmd
+            elif cmd == "MD":
+                motor.registers.pop("ME", None)
+            elif response.startswith("RS=") and _FAULT_FLAGS.intersection(response[3:]):
+                motor.registers.clear()
+            elif response.startswith("AL=") and response[3:].strip("0"):
+                motor.registers.clear()
+            elif cmd == SCLCommands.ALARM_RESET:
+                motor.registers.clear()
 
     async def execute_async(self, motor_name: str, commands: List[str], require_response: bool = False) -> List[str] | bool:
         """Execute a sequence of commands on a single motor asynchronously."""
 
         config = self.motor_config.get(motor_name)
         if not config:
-            print(f"[{motor_name}] ERROR: Motor not configured")
+            logger.error("[%s] Motor not configured", motor_name)
             if require_response:
                 raise ValueError(f"Motor {motor_name} not configured")
             return False
             
         try:
-            async with AsyncMotor(name=motor_name, ip=config.ip, port=config.port) as motor:
-                responses = []
-                for cmd in commands:
-                    res = await motor.send_command(cmd)
-                    if res is None:
-                        raise Exception(f"Command '{cmd}' failed")
-                    responses.append(res)
-                
+            async with self.pool.acquire(motor_name) as motor:
+                pending = commands
+                if self.shadow_registers:
+                    indices = self._pending_indices(motor, commands)
+                    if len(indices) < len(commands):
+                        pending = [commands[i] for i in indices]
+                        metrics.inc("automic_commands_skipped_total", len(commands) - len(indices), motor=motor_name, **self.labels)
+
+                if self.pipeline and len(pending) > 1:
+                    responses = await motor.send_pipelined(pending)
+                else:
+                    responses = []
+                    for index, cmd in enumerate(pending):
+                        res = await motor.send_command(cmd)
+                        if res is None:
+                            raise Exception(f"Command '{cmd}' failed")
+                        if motor._is_rejected(res):
+                            # Raised like a rejection in a pipelined batch; the pool then drops the connection and its shadow.
+                            motor._record_failure(cmd, res)
+                            raise PipelineError(motor_name, index, cmd, res)
+                        responses.append(res)
+
+                if self.shadow_registers:
+                    self._update_shadow(motor, pending, responses)
+                if pending is not commands:
+                    # Skipped writes are reported as the ack the drive would have sent.
+                    filled = ["%"] * len(commands)
+                    for index, res in zip(indices, responses):
+                        filled[index] = res
+                    responses = filled
+
+                self.monitor.record_success(motor_name, motor.last_rtt)
                 if require_response:
                     return responses
 
-                print(f"[{motor_name}] ✓ All {len(commands)} command(s) completed")
+                logger.debug("[%s] All %d command(s) completed", motor_name, len(commands))
                 return True
         except Exception as e:
-            print(f"[{motor_name}] EXCEPTION: {e}")
+            if isinstance(e, PipelineError) and e.response is not None:
+                self.monitor.record_success(motor_name)
+            else:
+                self.monitor.record_failure(motor_name, e)
+            logger.warning("[%s] Command list failed: %s", motor_name, e)
             raise e
 
     async def execute_batch_async(self, command_map: Dict[str, List[str]], require_response: bool = False) -> Dict[str, List[str] | bool]:
@@ -63,30 +196,133 @@ class MotorController:
                 results_map[name] = res
                 
         if errors:
-            print(f"[MotorController] Batch execution failed with errors: {errors}")
+            logger.error("Batch execution failed with errors: %s", errors)
             raise RuntimeError(f"Batch execution failed: {errors}")
             
         return results_map
 
-    async def _trigger_motors(self, motor_names: List[str], trigger_cmd: str) -> None:
-        """Sends the trigger command to all motors simultaneously."""
-        
-        command_map = {name: [trigger_cmd] for name in motor_names}
+    async def _trigger_motors(self, motor_names: List[str], trigger_cmd: str) -> Dict[str, float]:
+        """
+        Sends the trigger command to all motors simultaneously.
+
+        With sync_trigger, every drive is locked and armed first, then the
+        trigger packets are written back to back without yielding to the event
+        loop, and the acks are gathered afterwards. Returns the spread between
+        the first and last write and between the first and last ack.
+        """
+
+        if not self.sync_trigger:
+            command_map = {name: [trigger_cmd] for name in motor_names}
+            try:
+                await self.execute_batch_async(command_map)
+            except RuntimeError as e:
+                logger.error("Trigger failed: %s", e)
+                raise RuntimeError(f"Trigger phase failed: {e}")
+            return {}
+
         try:
-            await self.execute_batch_async(command_map)
-        except RuntimeError as e:
-            print(f"[MotorController] Trigger failed: {e}")
+            async with self.pool.acquire_many(motor_names) as motors:
+                await asyncio.gather(*(motor.arm() for motor in motors.values()))
+
+                sent = [motor.write_nowait(trigger_cmd) for motor in motors.values()]
+
+                acks = await asyncio.gather(
+                    *(motor.read_reply(trigger_cmd) for motor in motors.values()),
+                    return_exceptions=True,
+                )
+                errors = {name: str(res) for name, res in zip(motors, acks) if isinstance(res, Exception)}
+                for name, res in zip(motors, acks):
+                    if name in errors:
+                        if isinstance(res, PipelineError) and res.response is not None:
+                            self.monitor.record_success(name)
+                        else:
+                            self.monitor.record_failure(name, res)
+                    else:
+                        self.monitor.record_success(name, motors[name].last_rtt)
+                if errors:
+                    raise RuntimeError(f"Batch execution failed: {errors}")
+        except Exception as e:
+            logger.error("Trigger failed: %s", e)
             raise RuntimeError(f"Trigger phase failed: {e}")
 
-    async def execute_movement_async(self, command_map: Dict[str, List[str]], trigger_cmd: str = SCLCommands.FEED_LENGTH):
+        write_skew = max(sent) - min(sent)
+        ack_skew = max(acks) - min(acks)
+        self._skew_hist["write"].observe(write_skew)
+        self._skew_hist["ack"].observe(ack_skew)
+        return {
+            "trigger_write_skew_ms": write_skew * 1000,
+            "trigger_ack_skew_ms": ack_skew * 1000,
+        }
+
+    async def execute_movement_async(self, command_map: Dict[str, List[str]], trigger_cmd: Optional[str] = None,
+                                     durations: Optional[Dict[str, float]] = None) -> MotionHandle:
         """
         Executes movement in two phases:
         1. Setup: Send all configuration commands (AC, DE, VE, DI)
-        2. Execute: Send trigger command (default FL) to all motors simultaneously
+        2. Execute: Send trigger command to all motors simultaneously
+           (FL or FP, whichever the command lists end with, unless given)
+        Returns once the trigger is acknowledged. The returned MotionHandle
+        carries the wall-clock duration of each phase in milliseconds (plus
+        the trigger write/ack skew when sync_trigger is enabled) and can be
+        awaited for move completion; see trigger_movement_async for `durations`.
+        Raises MoveCancelledError if an emergency stop preempts the move.
         """
 
-        print(f"\n[MotorController] Starting async movement execution for {len(command_map)} motor(s)")
-        
+        epoch = self.stop_epoch
+        return await self._preemptible(self._run_movement(command_map, trigger_cmd, epoch, durations), epoch)
+
+    async def setup_movement_async(self, command_map: Dict[str, List[str]], epoch: Optional[int] = None) -> Dict[str, float]:
+        """
+        Runs only the setup phase of a move (everything except FL/FP).
+        Drives latch move parameters at the trigger, so this may overlap the
+        previous move's motion. Pass the same `epoch` (stop_epoch when the
+        sequence started) to trigger_movement_async.
+        """
+        epoch = self.stop_epoch if epoch is None else epoch
+        return await self._preemptible(self._setup_phase(command_map, epoch), epoch)
+
+    async def trigger_movement_async(self, command_map: Dict[str, List[str]], trigger_cmd: Optional[str] = None,
+                                     epoch: Optional[int] = None, timings: Optional[Dict[str, float]] = None,
+                                     durations: Optional[Dict[str, float]] = None) -> MotionHandle:
+        """
+        Triggers a move whose setup phase already ran; `timings` is what
+        setup_movement_async returned. `durations` are per-drive predicted
+        move times (s) for moves predict_duration cannot infer, such as FP.
+        """
+        epoch = self.stop_epoch if epoch is None else epoch
+        return await self._preemptible(self._trigger_phase(command_map, trigger_cmd, epoch, timings or {}, durations), epoch)
+
+    @staticmethod
+    def _trigger_for(command_map: Dict[str, List[str]]) -> str:
+        """The trigger the command lists end with: FP if they are absolute moves, FL otherwise."""
+        absolute = {SCLCommands.FEED_POSITION in cmds for cmds in command_map.values()}
+        if len(absolute) > 1:
+            raise ValueError("Cannot trigger absolute (FP) and relative (FL) moves together")
+        return SCLCommands.FEED_POSITION if True in absolute else SCLCommands.FEED_LENGTH
+
+    async def _preemptible(self, coro, epoch: int):
+        """Runs a move phase as a tracked task that emergency_stop_async can cancel."""
+        if self.stop_epoch != epoch:
+            coro.close()
+            raise MoveCancelledError("Move cancelled by emergency stop")
+        task = asyncio.create_task(coro)
+        self._moves.add(task)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if task.cancelled() and self.stop_epoch != epoch:
+                raise MoveCancelledError("Move cancelled by emergency stop")
+            raise
+        finally:
+            self._moves.discard(task)
+
+    async def _run_movement(self, command_map: Dict[str, List[str]], trigger_cmd: Optional[str], epoch: int,
+                            durations: Optional[Dict[str, float]] = None) -> MotionHandle:
+        logger.debug("Starting async movement execution for %d motor(s)", len(command_map))
+        timings = await self._setup_phase(command_map, epoch)
+        return await self._trigger_phase(command_map, trigger_cmd, epoch, timings, durations)
+
+    async def _setup_phase(self, command_map: Dict[str, List[str]], epoch: int) -> Dict[str, float]:
         setup_map = {}
         trigger_cmds = [SCLCommands.FEED_LENGTH, SCLCommands.FEED_POSITION]
         
@@ -94,32 +330,101 @@ class MotorController:
             setup_cmds = [c for c in cmds if c not in trigger_cmds]
             setup_map[name] = setup_cmds
 
-        print("[MotorController] Phase 1: Setup - Sending configuration...")
+        started = time.perf_counter()
+        logger.debug("Phase 1: Setup - Sending configuration...")
         await self.execute_batch_async(setup_map)
-        
-        print(f"[MotorController] Phase 2: Triggering execution with '{trigger_cmd}'...")
-        await self._trigger_motors(list(command_map.keys()), trigger_cmd)  
-        
-        print("[MotorController] Movement execution completed successfully\n")
+        setup_done = time.perf_counter()
 
-    async def emergency_stop_async(self) -> None:
-        """Immediately sends ST (Stop) to all motors, bypassing the movement pipeline."""
+        self._phase_hist["setup"].observe(setup_done - started)
+        return {"setup_ms": (setup_done - started) * 1000}
+
+    async def _trigger_phase(self, command_map: Dict[str, List[str]], trigger_cmd: Optional[str], epoch: int, timings: Dict[str, float],
+                             durations: Optional[Dict[str, float]] = None) -> MotionHandle:
+        if self.stop_epoch != epoch:
+            raise MoveCancelledError("Move cancelled by emergency stop")
+        trigger_cmd = trigger_cmd or self._trigger_for(command_map)
+
+        started = time.perf_counter()
+        logger.debug("Phase 2: Triggering execution with '%s'...", trigger_cmd)
+        skew = await self._trigger_motors(list(command_map.keys()), trigger_cmd)
+        trigger_done = time.perf_counter()
+
+        logger.debug("Movement execution completed successfully")
+        setup = timings.get("setup_ms", 0.0) / 1000
+        self._phase_hist["trigger"].observe(trigger_done - started)
+        self._phase_hist["total"].observe(setup + trigger_done - started)
+        timings = {
+            "setup_ms": setup * 1000,
+            "trigger_ms": (trigger_done - started) * 1000,
+            "total_ms": (setup + trigger_done - started) * 1000,
+            **skew,
+        }
+        durations = durations or {}
+        predicted = {
+            name: durations[name] if name in durations else predict_duration(cmds)
+            for name, cmds in command_map.items()
+        }
+        return MotionHandle(self, predicted, timings, triggered_at=trigger_done)
+
+    async def emergency_stop_async(self) -> Dict[str, float]:
+        """
+        Stops all motors. Every in-flight move is cancelled (none can run
+        again before the ST packets are written, since cancellation only takes
+        effect at their next await), then ST goes out on the dedicated stop
+        channel, bypassing the pool's per-drive locks.
+        Returns the time from the request to each drive's ST ack, and to the
+        last one (stop_ms), in milliseconds.
+        """
         
-        print("[MotorController] !!! EMERGENCY STOP TRIGGERED !!!")
+        started = time.perf_counter()
+        self.stop_epoch += 1
+        for task in list(self._moves):
+            task.cancel()
+        acks = await self.stop_channel.stop_all()
 
-        motor_names = list(self.motor_config.keys())
-        tasks = [self.execute_async(name, [SCLCommands.STOP]) for name in motor_names]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        logger.warning("EMERGENCY STOP TRIGGERED")
 
-        failures = [name for name, res in zip(motor_names, results) if isinstance(res, Exception)]
+        failures = [name for name, ack in acks.items() if ack is None]
         if failures:
-            print(f"[MotorController] WARNING: Stop failed for: {failures}")
+            logger.error("Stop failed for: %s", failures)
             raise RuntimeError(f"Emergency stop failed for motors: {failures}")
 
-        print("[MotorController] All motors stopped successfully.")
+        latency = max(acks.values()) - started
+        self._stop_hist.observe(latency)
+        logger.warning("All motors stopped in %.2f ms.", latency * 1000)
+        return {
+            "stop_ms": latency * 1000,
+            **{f"{name}_ms": (ack - started) * 1000 for name, ack in acks.items()},
+        }
+
+    async def read_positions_async(self) -> Dict[str, int]:
+        """
+        Reads every drive's absolute position counter (steps) in parallel.
+        Raises RuntimeError if any drive cannot be read.
+        """
+        names = list(self.motor_config)
+        results = await asyncio.gather(
+            *(self.execute_async(name, CommandSequence.read_position(), require_response=True) for name in names),
+            return_exceptions=True,
+        )
+
+        positions, errors = {}, {}
+        for name, res in zip(names, results):
+            try:
+                if isinstance(res, Exception):
+                    raise res
+                positions[name] = int(res[-1].split("=", 1)[-1])
+            except Exception as e:
+                errors[name] = str(e)
+        if errors:
+            raise RuntimeError(f"Position read failed: {errors}")
+        return positions
 
     async def check_connections_async(self) -> Dict[str, str]:
-        """Checks connection status of all configured motors asynchronously."""
+        """
+        Actively probes every configured motor with RS.
+        The API serves connection_status() instead; this is for explicit checks and benchmarks.
+        """
         
         results = {}
         
@@ -133,14 +438,14 @@ class MotorController:
                 pass
             return name, status
 
-        print(f"\n[MotorController] Checking connections async for {len(self.motor_config)} motor(s)...")
+        logger.debug("Checking connections async for %d motor(s)...", len(self.motor_config))
         tasks = [check_single(n) for n in self.motor_config.keys()]
         check_results = await asyncio.gather(*tasks)
         
         for name, status in check_results:
             results[name] = status
             
-        print(f"[MotorController] Connection check completed: {results}\n")
+        logger.debug("Connection check completed: %s", results)
         return results
 
     
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+Dedicated connections for emergency stop.
+"""
+
+import asyncio
+import math
+from typing import Dict, Optional
+
+from .config import MotorSettings, config
+from .commands import SCLCommands
+from .motor import AsyncMotor, PipelineError
+from .udp_motor import AsyncUdpMotor
+from .logging_setup import get_logger
+
+logger = get_logger("stop")
+
+
+class StopChannel:
+    """
+    One extra connection per drive, used only for ST.
+
+    The channel is opened when the controller starts and never shares the
+    pool's per-drive locks, so a stop does not queue behind move setup or
+    tension polls. It uses the short stop_timeout for connecting and for the
+    ack, so an unreachable drive costs at most that long. ST is idempotent,
+    so over UDP it is resent every udp_retry_timeout until it is acked.
+    """
+
+    def __init__(self, motor_config: Dict[str, MotorSettings], rig: Optional[str] = None):
+        self.motor_config = motor_config
+        self.rig = rig
+        self.timeout = config.motion.stop_timeout
+        self._motors: Dict[str, AsyncMotor] = {}
+        self._lock = asyncio.Lock()
+
+    def _create(self, motor_name: str) -> AsyncMotor:
+        settings = self.motor_config[motor_name]
+        if settings.transport == "udp":
+            motor = AsyncUdpMotor(name=motor_name, ip=settings.ip, port=settings.udp_port, timeout=self.timeout, rig=self.rig)
+            # Keep resending ST for the whole stop timeout.
+            motor.retries = max(motor.retries, math.ceil(self.timeout / motor.retry_timeout))
+            return motor
+        return AsyncMotor(name=motor_name, ip=settings.ip, port=settings.port, timeout=self.timeout, rig=self.rig)
+
+    async def _ensure_open(self, motor_name: str) -> Optional[AsyncMotor]:
+        motor = self._motors.get(motor_name)
+        if motor is not None and motor.is_connected:
+            return motor
+        motor = self._create(motor_name)
+        try:
+            await motor.connect()
+        except Exception as e:
+            logger.warning("%s: stop channel unavailable: %s", motor_name, e)
+            return None
+        self._motors[motor_name] = motor
+        return motor
+
+    async def _await_ack(self, motor: AsyncMotor, deadline: float) -> float:
+        """read_reply() for ST, given up at `deadline` (loop time)."""
+        remaining = deadline - asyncio.get_running_loop().time()
+        try:
+            return await asyncio.wait_for(motor.read_reply(SCLCommands.STOP), timeout=max(remaining, 0.0))
+        except asyncio.TimeoutError:
+            raise PipelineError(motor.name, 0, SCLCommands.STOP, None)
+
+    async def open_all(self) -> None:
+        """Opens any channel that is not connected. Safe to call repeatedly."""
+        await asyncio.gather(*(self._ensure_open(name) for name in self.motor_config))
+
+    async def stop_all(self) -> Dict[str, Optional[float]]:
+        """
+        Writes ST to every open channel back to back, then collects the acks.
+        Channels that are down are reopened and stopped afterwards.
+        Returns each drive's ack time (perf_counter), or None if it did not ack.
+        """
+        async with self._lock:
+            deadline = asyncio.get_running_loop().time() + self.timeout
+            ready = {name: m for name, m in self._motors.items() if m.is_connected}
+            for motor in ready.values():
+                motor._discard_stale()
+            for motor in ready.values():
+                motor.write_nowait(SCLCommands.STOP)
+
+            missing = [name for name in self.motor_config if name not in ready]
+            reopened = await asyncio.gather(*(self._ensure_open(name) for name in missing))
+            for motor in reopened:
+                if motor is not None:
+                    motor.write_nowait(SCLCommands.STOP)
+                    ready[motor.name] = motor
+
+            acks = await asyncio.gather(
+                *(self._await_ack(motor, deadline) for motor in ready.values()),
+                return_exceptions=True,
+            )
+
+        results: Dict[str, Optional[float]] = {name: None for name in self.motor_config}
+        for (name, motor), ack in zip(ready.items(), acks):
+            if isinstance(ack, Exception):
+                logger.error("%s: no ST ack on stop channel: %s", name, ack)
+                await motor.close()
+                self._motors.pop(name, None)
+            else:
+                results[name] = ack
+        return results
+
+    async def close(self) -> None:
+        for motor in self._motors.values():
+            await motor.close()
+        self._motors.clear()
@@ -0,0 +1,261 @@
+"""
+eSCL over UDP for Applied Motion drives.
+"""
+
+import asyncio
+import time
+from typing import List, Optional
+
+from .config import config
+from .commands import SCLCommands
+from .framing import FrameDecoder, EsclDatagramProtocol
+from .motor import AsyncMotor, PipelineError
+from .metrics import metrics
+
+
+class AsyncUdpMotor(AsyncMotor):
+    """
+    AsyncMotor that talks eSCL over UDP instead of TCP.
+
+    eSCL has no sequence numbers on the wire, so requests are tracked locally:
+    one request is outstanding at a time and its reply is the next datagram.
+    Commands are retransmitted after udp_retry_timeout, except FL: a lost
+    reply does not mean a lost move, and a relative move must not run twice
+    (FP is an absolute target, so resending it is safe). tx_seq and rx_seq
+    count datagrams sent and replies received; while replies are missing
+    after a retransmit, late datagrams may still arrive, so for a short
+    window they are dropped as duplicates before the next send.
+    """
+
+    _NO_RETRANSMIT = {SCLCommands.FEED_LENGTH}
+    _QUERIES = {SCLCommands.REQUEST_STATUS, SCLCommands.ANALOG_INPUT, SCLCommands.ALARM_CODE, "IP"}
+
+    def __init__(self, name, ip, port=7775, timeout=None, rig=None):
+        super().__init__(name, ip, port=port, timeout=timeout, rig=rig)
+        self.retry_timeout = config.motion.udp_retry_timeout
+        self.retries = config.motion.udp_retries
+        self.tx_seq = 0
+        self.rx_seq = 0
+        self.retransmits = 0
+        self.duplicates_dropped = 0
+        self._quarantine_until = 0.0
+
+    def _create_protocol(self) -> EsclDatagramProtocol:
+        decoder = FrameDecoder(
+            header=config.protocol.header_bytes,
+            terminator=config.protocol.terminator_byte,
+            encoding=config.protocol.encoding,
+            size=config.motion.recv_buffer_size,
+        )
+        return EsclDatagramProtocol(decoder)
+
+    async def connect(self):
+        """Opens a connected UDP socket to the drive."""
+        try:
+            loop = asyncio.get_running_loop()
+            self.transport, self.protocol = await loop.create_datagram_endpoint(
+                self._create_protocol, remote_addr=(self.ip, self.port)
+            )
+            return self
+        except OSError as e:
+            metrics.inc("automic_connection_failures_total", **self.labels)
+            self._log_error("Connection failed: %s", e)
+            raise e
+
+    def _discard_stale(self) -> None:
+        dropped = self.protocol.discard_pending() if self.protocol else 0
+        self.rx_seq += dropped
+        if dropped:
+            self.duplicates_dropped += dropped
+            self._log_error("Dropped %s duplicate/stale datagram(s)", dropped)
+
+    def _plausible(self, command: str, response: str) -> bool:
+        """Cheap check that a reply belongs to the command it was matched with."""
+        if "=" in response:
+            return command.startswith(response.split("=", 1)[0])
+        return command not in self._QUERIES
+
+    def _send(self, packet: bytes) -> None:
+        self.tx_seq += 1
+        self.transport.sendto(packet)
+
+    async def _receive(self, timeout: float) -> Optional[str]:
+        response = await asyncio.wait_for(self.protocol.frames.get(), timeout=timeout)
+        self.rx_seq += 1
+        return response
+
+    async def _settle_duplicates(self) -> None:
+        """
+        Waits out the duplicate window left by a retransmit, unless every
+        datagram sent has already been answered, then drops what arrived.
+        Replies still missing after that are taken as lost.
+        """
+        remaining = self._quarantine_until - asyncio.get_running_loop().time()
+        if remaining > 0 and self.rx_seq < self.tx_seq:
+            await asyncio.sleep(remaining)
+        self._discard_stale()
+        self.rx_seq = self.tx_seq
+
+    async def _request(self, command: str) -> str:
+        """Sends one request and returns its reply, retransmitting idempotent commands."""
+        if not self.is_connected:
+            raise ConnectionError("Not connected")
+
+        await self._settle_duplicates()
+        packet = self._build_packet(command)
+
+        retries = 0 if command in self._NO_RETRANSMIT else self.retries
+        waits = [self.retry_timeout] * retries + [self.timeout]
+
+        for attempt, wait in enumerate(waits):
+            started = time.perf_counter()
+            self._send(packet)
+            try:
+                response = await self._receive(wait)
+            except asyncio.TimeoutError:
+                if attempt + 1 < len(waits):
+                    self.retransmits += 1
+                    metrics.inc("automic_udp_retransmits_total", **self.labels)
+                    continue
+                self._record_failure(command, None)
+                raise
+
+            self._observe(command, time.perf_counter() - started)
+
+            if attempt > 0:
+                loop = asyncio.get_running_loop()
+                self._quarantine_until = loop.time() + self.retry_timeout * attempt
+            return response
+
+    async def send_command(self, command: str) -> Optional[str]:
+        """
+        Sends a command over UDP and returns the response.
+        Returns None on failure.
+        """
+        if not command:
+            return None
+
+        try:
+            response = await self._request(command)
+
+            if response is None:
+                self._log_error("No response for '%s'", command)
+                return None
+
+            self._log_info("Sent '%s' -> Received: '%s'", command, response)
+            return response
+
+        except asyncio.TimeoutError:
+            self._log_error("Timeout for '%s'", command)
+            return None
+        except Exception as e:
+            self._log_error("Exception sending '%s': %s", command, e)
+            return None
+
+    async def send_pipelined(self, commands: List[str]) -> List[str]:
+        """
+        Sends every datagram back to back and collects the replies in order.
+        Without wire sequence numbers a lost datagram makes the reply order
+        ambiguous, so on any loss (or a reply that cannot belong to its
+        command) the list is replayed one request at a time.
+        Lists containing FL are always sent one at a time.
+        """
+        if not commands:
+            return []
+
+        if any(cmd in self._NO_RETRANSMIT for cmd in commands):
+            return await self._send_sequential(commands)
+
+        if not self.is_connected:
+            raise ConnectionError("Not connected")
+
+        await self._settle_duplicates()
+        started = time.perf_counter()
+        for cmd in commands:
+            self._send(self._build_packet(cmd))
+
+        responses = []
+        try:
+            for _ in commands:
+                response = await self._receive(self.retry_timeout)
+                if response is None:
+                    break
+                self._observe(commands[len(responses)], time.perf_counter() - started)
+                responses.append(response)
+        except asyncio.TimeoutError:
+            pass
+
+        mismatched = not all(self._plausible(cmd, res) for cmd, res in zip(commands, responses))
+        if len(responses) < len(commands) or mismatched:
+            self.retransmits += 1
+            metrics.inc("automic_udp_retransmits_total", **self.labels)
+            self._log_error("Lost or misordered %s datagram(s), replaying sequentially", len(commands) - len(responses))
+            loop = asyncio.get_running_loop()
+            self._quarantine_until = loop.time() + self.retry_timeout
+            return await self._send_sequential(commands)
+
+        for index, (cmd, response) in enumerate(zip(commands, responses)):
+            if self._is_rejected(response):
+                self._record_failure(cmd, response)
+                self._log_error("Pipelined '%s' failed -> '%s'", cmd, response)
+                raise PipelineError(self.name, index, cmd, response)
+            self._log_info("Sent '%s' -> Received: '%s'", cmd, response)
+
+        return responses
+
+    async def _send_sequential(self, commands: List[str]) -> List[str]:
+        responses = []
+        for index, cmd in enumerate(commands):
+            try:
+                response = await self._request(cmd)
+            except asyncio.TimeoutError:
+                response = None
+            if response is None or self._is_rejected(response):
+                self._log_error("'%s' failed -> '%s'", cmd, response)
+                raise PipelineError(self.name, index, cmd, response)
+            self._log_info("Sent '%s' -> Received: '%s'", cmd, response)
+            responses.append(response)
+        return responses
+
+    async def arm(self) -> None:
+        """Waits out any duplicate window so the next datagram's reply is unambiguous."""
+        if not self.is_connected:
+            raise ConnectionError("Not connected")
+        await self._settle_duplicates()
+
+    def write_nowait(self, command: str) -> float:
+        self._send(self._build_packet(command))
+        self._sent_at = time.perf_counter()
+        return self._sent_at
+
+    async def read_reply(self, command: str) -> float:
+        """
+        Waits for the reply to a command sent with write_nowait and returns its
+        arrival timestamp, resending the datagram like _request does (never
+        FL). Raises PipelineError on timeout or rejection.
+        """
+        retries = 0 if command in self._NO_RETRANSMIT else self.retries
+        waits = [self.retry_timeout] * retries + [self.timeout]
+        for attempt, wait in enumerate(waits):
+            try:
+                response = await self._receive(wait)
+                break
+            except asyncio.TimeoutError:
+                if attempt + 1 == len(waits):
+                    self._record_failure(command, None)
+                    raise PipelineError(self.name, 0, command, None)
+                self.write_nowait(command)
+                self.retransmits += 1
+                metrics.inc("automic_udp_retransmits_total", **self.labels)
+
+        received = time.perf_counter()
+        if attempt > 0:
+            self._quarantine_until = asyncio.get_running_loop().time() + self.retry_timeout * attempt
+        if response is None or self._is_rejected(response):
+            if response is not None:
+                self._record_failure(command, response)
+            raise PipelineError(self.name, 0, command, response)
+
+        self._observe(command, received - self._sent_at)
+        self._log_info("Sent '%s' -> Received: '%s'", command, response)
+        return received
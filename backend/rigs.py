@@ -0,0 +1,72 @@
+"""
+Registry of independently configured rigs served by one backend process.
+"""
+
+import asyncio
+import os
+from typing import Dict, Optional
+
+from motor_driver import MotorController, config
+from motor_driver.config import RigSettings
+from motor_driver.logging_setup import get_logger
+from kinematic import KinematicsSolver
+from tension import TensionService
+from scheduler import MoveScheduler
+from calibration import SampleLog
+
+logger = get_logger("rigs")
+
+DEFAULT_RIG = "default"
+
+
+class Rig:
+    """One rig's controller, solver, tension service, move scheduler and calibration samples."""
+
+    def __init__(self, rig_id: str, settings: RigSettings):
+        self.id = rig_id
+        self.settings = settings
+        # The default rig keeps unlabelled metric series, as before rigs existed.
+        label = None if rig_id == DEFAULT_RIG else rig_id
+        self.controller = MotorController(motor_config=settings.motors, rig=label)
+        self.solver = KinematicsSolver(settings)
+        self.scheduler = MoveScheduler(self.controller, self.solver)
+        self.tension = TensionService(self.controller, settings, self.scheduler)
+        self.calibration = SampleLog(os.path.join(settings.kinematics.calibration_dir, f"{rig_id}.jsonl"))
+
+    async def start(self) -> None:
+        """
+        Loads (or builds, the first time for this geometry) the solver's
+        grids in a worker thread, so other rigs and requests keep running,
+        then starts the rig's background tasks.
+        """
+        await asyncio.to_thread(self.solver.load_grids)
+        self.controller.start()
+        self.scheduler.start()
+
+    async def close(self) -> None:
+        await self.scheduler.stop()
+        await self.controller.close()
+
+
+class RigRegistry:
+    """
+    Holds every configured rig. Rigs share the event loop but nothing else:
+    each has its own connections, locks, scheduler and watchdog.
+    """
+
+    def __init__(self, rigs: Optional[Dict[str, RigSettings]] = None):
+        rigs = rigs if rigs is not None else config.all_rigs
+        self.rigs: Dict[str, Rig] = {rig_id: Rig(rig_id, settings) for rig_id, settings in rigs.items()}
+
+    def get(self, rig_id: str) -> Rig:
+        rig = self.rigs.get(rig_id)
+        if rig is None:
+            raise KeyError(f"Rig {rig_id} not configured")
+        return rig
+
+    async def start(self) -> None:
+        await asyncio.gather(*(rig.start() for rig in self.rigs.values()))
+        logger.info("Serving %d rig(s): %s", len(self.rigs), ", ".join(self.rigs))
+
+    async def close(self) -> None:
+        await asyncio.gather(*(rig.close() for rig in self.rigs.values()))
@@ -0,0 +1,269 @@
+"""
+Single-writer scheduler for /move requests.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from motor_driver import MotorController, MotionHandle, MoveCancelledError
+from motor_driver.logging_setup import get_logger
+from motor_driver.metrics import metrics
+from kinematic import MOTOR_NAMES, KinematicsSolver, MovePlan
+
+logger = get_logger("scheduler")
+
+metrics.describe("automic_moves_coalesced_total", "counter", "Move targets dropped because a newer target arrived first.")
+
+Job = Callable[[int], Awaitable[Tuple[str, Any]]]
+
+
+class MoveScheduler:
+    """
+    Serializes moves through one task so only it plans and commits solver state.
+
+    At most one request waits while a move is in flight; a newer request
+    replaces it (latest target wins) and the replaced caller is told it was
+    superseded. The next move is planned only after the previous one has
+    finished, from the counts that move actually committed. After an
+    emergency stop or a failed move, the solver is resynced from the drives'
+    counters before the next move is planned.
+
+    Everything else that moves the drives or rewrites solver state (tension
+    corrections, calibration) runs on the same task through run_exclusive(),
+    so it can never land between a move's setup and its trigger.
+    """
+
+    def __init__(self, controller: MotorController, solver: KinematicsSolver):
+        self.controller = controller
+        self.solver = solver
+        self.current: Optional[MotionHandle] = None
+        self._pending: Optional[Tuple[Job, asyncio.Future, int]] = None
+        self._exclusive: Deque[Tuple[Job, asyncio.Future, int]] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._synced_epoch = controller.stop_epoch
+        self._stale = False
+
+    def _check_running(self) -> None:
+        if self._task is None or self._task.done():
+            raise RuntimeError("Move scheduler is not running")
+
+    async def _enqueue(self, job: Job) -> Tuple[str, Any]:
+        self._check_running()
+
+        future = asyncio.get_running_loop().create_future()
+        if self._pending is not None:
+            _, replaced, _ = self._pending
+            if not replaced.done():
+                replaced.set_result(("superseded", None))
+            metrics.inc("automic_moves_coalesced_total", **self.controller.labels)
+        self._pending = (job, future, self.controller.stop_epoch)
+        self._wakeup.set()
+        return await future
+
+    async def submit(self, x: float, y: float, z: float) -> Tuple[str, Optional[MotionHandle]]:
+        """
+        Queues a target and waits until it is triggered or superseded.
+        Returns ("success", handle), ("error", None) when no motion is needed,
+        ("superseded", None), or ("cancelled", None) if an emergency stop
+        happened before the target ran.
+        """
+        self.solver.check_bounds(x, y, z)
+        return await self._enqueue(lambda epoch: self._execute([x, y, z], epoch))
+
+    async def submit_path(self, waypoints: List[List[float]], straight: bool = False) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+        """
+        Queues a multi-waypoint tour and waits until it has finished.
+        With straight=True each leg is split so the mic follows the straight
+        line between waypoints (see KinematicsSolver.segment_line).
+        Returns ("success", segments) with per-segment timings, or a status
+        and None like submit().
+        """
+        if not waypoints:
+            raise ValueError("At least one waypoint is required")
+        self.solver.check_bounds_many(waypoints)
+        return await self._enqueue(lambda epoch: self._execute_path(waypoints, epoch, straight))
+
+    async def run_exclusive(self, job: Callable[[int], Awaitable[Any]]) -> Any:
+        """
+        Runs job(epoch) on the scheduler task once the move in flight has
+        finished, ahead of any queued move, and returns its result. `epoch`
+        is the stop epoch when the job was queued. Unlike moves, these jobs
+        are never coalesced; they run in the order they were queued.
+        """
+        self._check_running()
+        future = asyncio.get_running_loop().create_future()
+        self._exclusive.append((job, future, self.controller.stop_epoch))
+        self._wakeup.set()
+        return await future
+
+    async def calibrate(self, x: float, y: float, z: float) -> bool:
+        """
+        Calibrates the solver at (x, y, z) between moves, recording the
+        drives' position counters as the reference when they can be read.
+        Returns whether they could.
+        """
+        async def job(epoch: int) -> bool:
+            try:
+                counts = await self.controller.read_positions_async()
+            except Exception as e:
+                logger.warning("Calibrating without a drive position reference: %s", e)
+                counts = None
+            self.solver.calibrate_position(x, y, z, counts=[counts[name] for name in MOTOR_NAMES] if counts else None)
+            self._stale = False
+            self._synced_epoch = self.controller.stop_epoch
+            return counts is not None
+
+        return await self.run_exclusive(job)
+
+    async def _settle(self) -> None:
+        """Waits for the move in flight, if any, to finish."""
+        if self.current is None:
+            return
+        try:
+            await self.current
+        except Exception as e:
+            logger.error("Previous move did not complete cleanly: %s", e)
+        self.current = None
+
+    async def resync(self) -> None:
+        """Adopts the drives' position counters as the solver's committed state."""
+        counts = await self.controller.read_positions_async()
+        position, residual = self.solver.resync([counts[name] for name in MOTOR_NAMES])
+        logger.info("Resynced at %s from drive counters (residual %.4f in)", position, residual)
+
+    async def _resync_if_stale(self) -> None:
+        if not self._stale and self._synced_epoch == self.controller.stop_epoch:
+            return
+        if self.solver.reference_counts is not None:
+            try:
+                await self.resync()
+            except Exception as e:
+                logger.warning("Could not resync from drive counters: %s", e)
+                return
+        elif self.solver.counts is not None:
+            logger.warning("Solver state may be stale after a stop or failed move; recalibrate to resync")
+        self._stale = False
+        self._synced_epoch = self.controller.stop_epoch
+
+    async def _trigger(self, plan: MovePlan, epoch: int, timings: Dict[str, float]) -> MotionHandle:
+        return await self.controller.trigger_movement_async(
+            plan.command_map, epoch=epoch, timings=timings,
+            durations={name: plan.duration for name in plan.command_map},
+        )
+
+    async def _execute(self, target: List[float], epoch: int) -> Tuple[str, Optional[MotionHandle]]:
+        started = time.perf_counter()
+        plan = self.solver.plan(*target)
+        planned = time.perf_counter()
+        if not plan.command_map:
+            return "error", None
+        timings = await self.controller.setup_movement_async(plan.command_map, epoch)
+        handle = await self._trigger(plan, epoch, timings)
+        handle.timings["plan_ms"] = (planned - started) * 1000
+        self.solver.commit(plan)
+        self.current = handle
+        return "success", handle
+
+    async def _execute_path(self, waypoints: List[List[float]], epoch: int, straight: bool = False) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Runs a solved tour back to back. Each segment's setup is sent while
+        the previous segment is still moving; its trigger waits for that
+        motion to finish.
+        """
+        if straight:
+            waypoints = self.solver.segment_path(waypoints)
+        plans = self.solver.plan_path(waypoints)
+        segments: List[Dict[str, Any]] = []
+        previous: Optional[Dict[str, Any]] = None
+
+        for index, plan in enumerate(plans):
+            segment: Dict[str, Any] = {"index": index, "position": plan.target}
+            segments.append(segment)
+            if not plan.command_map:
+                segment["status"] = "no_motion"
+                continue
+
+            overlapped = self.current is not None
+            timings = await self.controller.setup_movement_async(plan.command_map, epoch)
+            if self.current is not None:
+                previous.update(await self.current)
+                self.current = None
+
+            handle = await self._trigger(plan, epoch, timings)
+            self.solver.commit(plan)
+            self.current = handle
+            segment.update(status="success", setup_overlapped=overlapped, **handle.timings)
+            previous = segment
+
+        if self.current is not None:
+            previous.update(await self.current)
+            self.current = None
+        return "success", segments
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            await self._settle()
+            self._wakeup.clear()
+            while self._exclusive:
+                job, future, epoch = self._exclusive.popleft()
+                if future.done():
+                    continue
+                await self._resync_if_stale()
+                try:
+                    result = await job(epoch)
+                except Exception as e:
+                    self._stale = True
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                if not future.done():
+                    future.set_result(result)
+            if self._pending is None:
+                continue
+            job, future, epoch = self._pending
+            self._pending = None
+            if future.done():
+                continue
+            if epoch != self.controller.stop_epoch:
+                future.set_result(("cancelled", None))
+                continue
+            await self._resync_if_stale()
+            try:
+                result = await job(epoch)
+            except MoveCancelledError:
+                self._stale = True
+                result = ("cancelled", None)
+            except Exception as e:
+                self._stale = True
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(result)
+
+    def start(self) -> None:
+        """Starts the scheduler task on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending is not None:
+            _, future, _ = self._pending
+            if not future.done():
+                future.cancel()
+            self._pending = None
+        while self._exclusive:
+            _, future, _ = self._exclusive.popleft()
+            if not future.done():
+                future.cancel()
@@ -0,0 +1,399 @@
+"""
+Local eSCL drive simulator for running the backend without hardware.
+
+Emulates enough of an Applied Motion drive for AsyncMotor and MotorController:
+\\x00\\x07 framing, acks for motion and register commands, RS status, IA analog
+readings and motion timing derived from the VE/AC/DE/DI registers.
+
+Usage:
+    python simulator.py --base-port 17776 --latency 0.0005 --jitter 0.0002
+and point the backend at it with the printed MOTORn_IP / MOTORn_PORT lines.
+"""
+
+import argparse
+import asyncio
+import math
+import random
+from typing import Dict, List, Optional, Tuple
+
+from motor_driver.config import MotorSettings, config
+
+
+class DriveState:
+    """Register and motion state of one simulated drive."""
+
+    def __init__(self, name: str, analog_voltage: float, steps_per_rev: int):
+        self.name = name
+        self.steps_per_rev = steps_per_rev
+        self.analog_voltage = analog_voltage
+        self.registers: Dict[str, float] = {
+            "AC": config.default_accel,
+            "DE": config.default_decel,
+            "VE": config.default_speed,
+            "DI": 0.0,
+        }
+        self.enabled = False
+        self.decimal_format = False
+        self.position = 0
+
+        self._move_start = 0.0
+        self._move_from = 0
+        self._move_steps = 0
+        self._profile: Tuple[float, float, float, float, float] = (0.0, 0.0, 0.0, 0.0, 0.0)
+
+    def _now(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    def _plan(self, steps: int) -> Tuple[float, float, float, float, float]:
+        """Trapezoid (or triangle) for |steps|: returns (peak velocity, accel, decel, accel time, total time) in revs."""
+        distance = abs(steps) / self.steps_per_rev
+        v = max(self.registers["VE"], 1e-6)
+        a = max(self.registers["AC"], 1e-6)
+        d = max(self.registers["DE"], 1e-6)
+
+        ramp = v * v / (2 * a) + v * v / (2 * d)
+        if distance >= ramp:
+            total = v / a + v / d + (distance - ramp) / v
+        else:
+            v = math.sqrt(2 * distance * a * d / (a + d))
+            total = v / a + v / d
+        return v, a, d, v / a, total
+
+    def move_duration(self, steps: int) -> float:
+        """Seconds a move of the given size takes with the current registers."""
+        return self._plan(steps)[4]
+
+    def _travelled(self, t: float) -> float:
+        """Revolutions covered t seconds into the current move."""
+        v, a, d, t_accel, total = self._profile
+        if t >= total:
+            return abs(self._move_steps) / self.steps_per_rev
+        if t < t_accel:
+            return 0.5 * a * t * t
+        t_decel = v / d
+        if t < total - t_decel:
+            return 0.5 * a * t_accel * t_accel + v * (t - t_accel)
+        remaining = total - t
+        return abs(self._move_steps) / self.steps_per_rev - 0.5 * d * remaining * remaining
+
+    def _update(self) -> None:
+        """Advances the interpolated position of an in-progress move."""
+        if self._move_steps == 0:
+            return
+        elapsed = self._now() - self._move_start
+        revs = self._travelled(elapsed)
+        direction = 1 if self._move_steps > 0 else -1
+        self.position = self._move_from + direction * int(round(revs * self.steps_per_rev))
+        if elapsed >= self._profile[4]:
+            self._move_steps = 0
+
+    @property
+    def moving(self) -> bool:
+        self._update()
+        return self._move_steps != 0
+
+    def _start_move(self, steps: int) -> None:
+        self._update()
+        self._move_from = self.position
+        self._move_steps = steps
+        self._move_start = self._now()
+        self._profile = self._plan(steps)
+
+    def _stop(self) -> None:
+        self._update()
+        self._move_steps = 0
+
+    def handle(self, command: str) -> str:
+        """Executes one command and returns the reply payload."""
+        code, arg = command[:2].upper(), command[2:].strip()
+
+        if command == "AS3":
+            return "%"
+        if command == "IFD":
+            self.decimal_format = True
+            return "%"
+        if command == "IFH":
+            self.decimal_format = False
+            return "%"
+
+        if code in self.registers:
+            if not arg:
+                return f"{code}={self.registers[code]:g}"
+            try:
+                self.registers[code] = float(arg)
+            except ValueError:
+                return "?"
+            return "%"
+
+        if code == "ME":
+            self.enabled = True
+            return "%"
+        if code == "MD":
+            self._stop()
+            self.enabled = False
+            return "%"
+        if code in ("FL", "FP"):
+            if not self.enabled:
+                return "?"
+            target = int(self.registers["DI"])
+            self._update()
+            self._start_move(target if code == "FL" else target - self.position)
+            return "%"
+        if code in ("ST", "SK"):
+            self._stop()
+            return "%"
+        if code == "SP":
+            self._stop()
+            self.position = int(float(arg or 0))
+            return "%"
+        if code == "IP":
+            self._update()
+            if self.decimal_format:
+                return f"IP={self.position}"
+            return f"IP={self.position & 0xFFFFFFFF:08X}"
+        if code == "RS":
+            return "RS=RM" if self.moving else "RS=RP"
+        if code == "IA":
+            voltage = self.analog_voltage + random.uniform(-0.005, 0.005)
+            if self.decimal_format:
+                return f"IA={voltage:.3f}"
+            return f"IA={int(voltage / 5.0 * 32760)}"
+        if code == "AL":
+            return "AL=0000"
+        if code == "AR":
+            return "%"
+        return "?"
+
+
+class SimulatedDrive:
+    """Serves one DriveState over TCP and, optionally, UDP with configurable latency, jitter and loss."""
+
+    def __init__(
+        self,
+        state: DriveState,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        udp: bool = False,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        loss: float = 0.0,
+    ):
+        self.state = state
+        self.host = host
+        self.port = port
+        self.udp = udp
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.commands_handled = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._udp_transport: Optional[asyncio.DatagramTransport] = None
+        self._connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def _reply(self, payload: bytes) -> bytes:
+        header = config.protocol.header_bytes
+        terminator = config.protocol.terminator_byte
+        encoding = config.protocol.encoding
+        command = payload.decode(encoding, errors="replace").strip()
+        self.commands_handled += 1
+        return header + self.state.handle(command).encode(encoding) + terminator
+
+    async def _handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        terminator = config.protocol.terminator_byte
+        header = config.protocol.header_bytes
+        pending: asyncio.Queue = asyncio.Queue()
+        responder = asyncio.create_task(self._respond_in_order(pending, writer))
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    frame = await reader.readuntil(terminator)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                frame = frame[:-len(terminator)].lstrip(b"\n")
+                if frame.startswith(header):
+                    frame = frame[len(header):]
+                pending.put_nowait((loop.time() + self._delay(), frame))
+        finally:
+            responder.cancel()
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def _respond_in_order(self, pending: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        """
+        Executes commands once their simulated delay has passed and replies.
+        A single consumer keeps TCP replies in order, so jitter delays but never reorders them.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            due, frame = await pending.get()
+            wait = due - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if writer.is_closing():
+                return
+            writer.write(self._reply(frame))
+
+    async def start(self) -> None:
+        """Starts the TCP server (and UDP endpoint on the same port number)."""
+        self._server = await asyncio.start_server(self._handle_tcp, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+        if self.udp:
+            loop = asyncio.get_running_loop()
+            self._udp_transport, _ = await loop.create_datagram_endpoint(
+                lambda: _DriveDatagramProtocol(self), local_addr=(self.host, self.port)
+            )
+
+    async def stop(self) -> None:
+        if self._udp_transport:
+            self._udp_transport.close()
+        if self._server:
+            self._server.close()
+            handlers = list(self._connections.values())
+            for writer in list(self._connections):
+                writer.close()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._server.wait_closed()
+
+
+class _DriveDatagramProtocol(asyncio.DatagramProtocol):
+    """Answers datagrams one at a time, in arrival order, like the drive's command processor."""
+
+    def __init__(self, drive: SimulatedDrive):
+        self.drive = drive
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self._pending: asyncio.Queue = asyncio.Queue()
+        self._responder: Optional[asyncio.Task] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self._responder = asyncio.create_task(self._respond_in_order())
+
+    def connection_lost(self, exc):
+        if self._responder:
+            self._responder.cancel()
+
+    def datagram_received(self, data, addr):
+        if random.random() < self.drive.loss:
+            return
+        frame = data.rstrip(config.protocol.terminator_byte)
+        if frame.startswith(config.protocol.header_bytes):
+            frame = frame[len(config.protocol.header_bytes):]
+        loop = asyncio.get_running_loop()
+        self._pending.put_nowait((loop.time() + self.drive._delay(), frame, addr))
+
+    async def _respond_in_order(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            due, frame, addr = await self._pending.get()
+            wait = due - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            reply = self.drive._reply(frame)
+            if random.random() < self.drive.loss or self.transport.is_closing():
+                continue
+            self.transport.sendto(reply, addr)
+
+
+class SimulatedRig:
+    """A set of simulated drives named like the real ones (motor1..motorN)."""
+
+    def __init__(
+        self,
+        count: int = 4,
+        host: str = "127.0.0.1",
+        base_port: int = 0,
+        udp: bool = False,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        loss: float = 0.0,
+        steps_per_rev: Optional[int] = None,
+    ):
+        steps_per_rev = steps_per_rev or config.motion.steps_per_rev
+        self.udp = udp
+        self.drives: Dict[str, SimulatedDrive] = {}
+        for i in range(1, count + 1):
+            name = f"motor{i}"
+            state = DriveState(name, _default_voltage(name), steps_per_rev)
+            port = base_port + i - 1 if base_port else 0
+            self.drives[name] = SimulatedDrive(state, host, port, udp, latency, jitter, loss)
+
+    async def start(self) -> "SimulatedRig":
+        for drive in self.drives.values():
+            await drive.start()
+        return self
+
+    async def stop(self) -> None:
+        for drive in self.drives.values():
+            await drive.stop()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def motor_settings(self, transport: str = "tcp") -> Dict[str, MotorSettings]:
+        """MotorSettings pointing a MotorController at these drives."""
+        return {
+            name: MotorSettings(ip=drive.host, port=drive.port, transport=transport, udp_port=drive.port)
+            for name, drive in self.drives.items()
+        }
+
+    def env_lines(self) -> List[str]:
+        lines = []
+        for i, drive in enumerate(self.drives.values(), start=1):
+            lines.append(f"MOTOR{i}_IP={drive.host}")
+            lines.append(f"MOTOR{i}_PORT={drive.port}")
+            if self.udp:
+                lines.append(f"MOTOR{i}_UDP_PORT={drive.port}")
+        return lines
+
+
+def _default_voltage(motor_name: str) -> float:
+    """An in-range tension reading for the motor, so the simulated rig starts healthy."""
+    tension = config.tension
+    if motor_name in tension.inverted_tension_motors:
+        return (tension.inverted_low_voltage_threshold + tension.inverted_high_voltage_threshold) / 2
+    return (tension.low_voltage_threshold + tension.high_voltage_threshold) / 2
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    rig = SimulatedRig(
+        count=args.drives,
+        host=args.host,
+        base_port=args.base_port,
+        udp=args.udp,
+        latency=args.latency,
+        jitter=args.jitter,
+        loss=args.loss,
+        steps_per_rev=args.steps_per_rev,
+    )
+    async with rig:
+        print("Simulated drives running. Backend .env overrides:")
+        for line in rig.env_lines():
+            print(f"  {line}")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate Applied Motion eSCL drives.")
+    parser.add_argument("--drives", type=int, default=4)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=17776)
+    parser.add_argument("--udp", action="store_true", help="Also answer eSCL over UDP on the same ports")
+    parser.add_argument("--latency", type=float, default=0.0, help="One-way reply delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter on the delay in seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="UDP datagram loss probability (each direction)")
+    parser.add_argument("--steps-per-rev", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
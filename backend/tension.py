@@ -1,8 +1,13 @@
 import asyncio
-from typing import Dict, List, Literal
+from typing import Dict, List, Literal, Optional
 from pydantic import BaseModel
 
 from motor_driver import MotorController, CommandSequence, config
+from motor_driver.config import RigSettings
+from motor_driver.logging_setup import get_logger
+from scheduler import MoveScheduler
+
+logger = get_logger("tension")
 
 class TensionReading(BaseModel):
     motor: str
@@ -10,9 +15,11 @@ class TensionReading(BaseModel):
     tension_status: Literal["ok", "low", "high", "error"]
 
 class TensionService:
-    def __init__(self, controller: MotorController):
+    def __init__(self, controller: MotorController, settings: Optional[RigSettings] = None, scheduler: Optional[MoveScheduler] = None):
         self.controller = controller
-        self.config = config.tension
+        self.scheduler = scheduler
+        self.settings = settings or config.default_rig
+        self.config = self.settings.tension
         self.sensor_motors = self.config.sensor_equipped_motors
 
     def _determine_status(self, motor_name: str, voltage: float) -> Literal["ok", "low", "high"]:
@@ -50,7 +57,7 @@ class TensionService:
             
             if responses and len(responses) > 0:
                 response = responses[-1]
-                print(f"[TensionService] Raw response for {motor_name}: {response}")
+                logger.debug("Raw response for %s: %s", motor_name, response)
             
                 if "=" in response:
                     val_str = response.split("=")[1]
@@ -59,11 +66,11 @@ class TensionService:
                 voltage = float(val_str)
                 status = self._determine_status(motor_name, voltage)
             else:
-                print(f"[TensionService] Empty response for {motor_name}")
+                logger.warning("Empty response for %s", motor_name)
                 status = "error"
 
         except Exception as e:
-            print(f"[TensionService] Error polling {motor_name}: {e}")
+            logger.warning("Error polling %s: %s", motor_name, e)
             voltage = 0.0
             status = "error"
 
@@ -81,7 +88,7 @@ class TensionService:
         readings = []
         for motor_name, res in zip(self.sensor_motors, results):
             if isinstance(res, Exception):
-                print(f"[TensionService] poll_all exception for {motor_name}: {res}")
+                logger.warning("poll_all exception for %s: %s", motor_name, res)
                 readings.append(TensionReading(motor=motor_name, voltage=0.0, tension_status="error"))
             else:
                 readings.append(res)
@@ -93,6 +100,7 @@ class TensionService:
         Sends a relative step command to adjust tension.
         - tighten: increases tension (retract / positive steps)
         - loosen: decreases tension (extend / negative steps)
+        With a scheduler, the correction runs between moves on its task.
         """
 
         if motor_name not in self.sensor_motors:
@@ -105,13 +113,24 @@ class TensionService:
 
         cmds = CommandSequence.move_relative(
             position=steps,
-            speed=config.default_speed,
-            accel=config.default_accel,
-            decel=config.default_decel
+            speed=self.settings.default_speed,
+            accel=self.settings.default_accel,
+            decel=self.settings.default_decel
         )
 
         command_map = {motor_name: cmds}
-        await self.controller.execute_movement_async(command_map)
+
+        async def correct(epoch: int) -> None:
+            timings = await self.controller.setup_movement_async(command_map, epoch)
+            motion = await self.controller.trigger_movement_async(command_map, epoch=epoch, timings=timings)
+            if self.scheduler is not None:
+                self.scheduler.solver.record_correction(motor_name, steps)
+            await motion
+
+        if self.scheduler is not None:
+            await self.scheduler.run_exclusive(correct)
+        else:
+            await correct(self.controller.stop_epoch)
 
         return {"motor": motor_name, "action": direction, "steps": steps}
 
@@ -0,0 +1,71 @@
+"""
+Geometry auto-calibration recovering a known rig from synthetic samples.
+"""
+
+import numpy as np
+import pytest
+
+from motor_driver.config import GeometrySettings, RigSettings
+from calibration import CalibrationSample, fit_geometry, write_env
+from kinematic import DRIVE_SIGNS
+
+
+def synthetic_samples(true_anchors: np.ndarray, step: float, count: int, seed: int = 5):
+    geo = GeometrySettings()
+    upper = np.array([geo.width_in, geo.height_in, geo.z_height_in])
+    positions = np.random.default_rng(seed).uniform(0.2, 0.8, (count, 3)) * upper
+    lengths = np.linalg.norm(positions[:, None, :] - true_anchors[None, :, :], axis=2)
+    # Shortening a cable by one step moves its counter by DRIVE_SIGNS.
+    counts = np.rint((lengths[0] - lengths) / step).astype(int) * DRIVE_SIGNS + [500, -300, 0, 1200]
+    return [CalibrationSample(position=p.tolist(), counts=c.tolist()) for p, c in zip(positions, counts)]
+
+
+def test_fit_recovers_perturbed_geometry():
+    settings = RigSettings(motors={})
+    geo = settings.geometry
+    nominal = np.array([geo.m1, geo.m2, geo.m3, geo.m4])
+    true_anchors = nominal + np.random.default_rng(6).normal(0, 1.5, nominal.shape)
+    true_step = settings.kinematics.kinematic_step_size * 1.02
+
+    samples = synthetic_samples(true_anchors, true_step, 30)
+    result = fit_geometry(samples, settings)
+
+    assert result.converged
+    assert result.initial_rms_in > 0.5
+    # Only the rounding of the counters to whole steps is left.
+    assert result.rms_in < true_step
+    fitted = np.array([result.geometry[f"m{i}"] for i in range(1, 5)])
+    assert np.abs(fitted - true_anchors).max() < 0.01
+    assert result.kinematic_step_size == pytest.approx(true_step, rel=1e-4)
+
+
+def test_slack_cables_are_left_out():
+    settings = RigSettings(motors={})
+    geo = settings.geometry
+    true_anchors = np.array([geo.m1, geo.m2, geo.m3, geo.m4]) + 0.5
+    samples = synthetic_samples(true_anchors, settings.kinematics.kinematic_step_size, 30)
+    # A slack motor3 cable reads long and low on tension.
+    samples[3].counts[2] -= 2000
+    samples[3].voltages = {"motor3": 0.1}
+
+    result = fit_geometry(samples, settings)
+    assert result.cables_used == 30 * 4 - 1
+    assert result.residuals_in[3][2] is None
+    assert result.rms_in < settings.kinematics.kinematic_step_size
+
+
+def test_fit_needs_enough_samples_and_writes_env(tmp_path):
+    settings = RigSettings(motors={})
+    geo = settings.geometry
+    samples = synthetic_samples(np.array([geo.m1, geo.m2, geo.m3, geo.m4]), settings.kinematics.kinematic_step_size, 5)
+    with pytest.raises(ValueError):
+        fit_geometry(samples[:4], settings)
+
+    result = fit_geometry(samples, settings)
+    env = tmp_path / ".env"
+    env.write_text("MOTION__STEPS_PER_REV=20000\nGEOMETRY__M1=[0, 0, 0]\n")
+    values = write_env(result, str(env))
+    text = env.read_text()
+    assert "MOTION__STEPS_PER_REV=20000" in text
+    assert text.count("GEOMETRY__M1=") == 1
+    assert all(f"{key}={value}" in text for key, value in values.items())
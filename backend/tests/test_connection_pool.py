@@ -0,0 +1,42 @@
+"""
+ConnectionPool.acquire_many against a partly unreachable rig.
+"""
+
+import asyncio
+
+from motor_driver.connection_pool import ConnectionPool
+from simulator import SimulatedRig
+
+
+def test_failed_connect_settles_sibling_connects_before_releasing_locks():
+    async def run():
+        async with SimulatedRig() as sim:
+            pool = ConnectionPool(sim.motor_settings())
+            open_connection = pool._open
+            running = set()
+
+            async def slow_open(name):
+                running.add(name)
+                try:
+                    if name == "motor1":
+                        raise ConnectionError("unreachable")
+                    await asyncio.sleep(0.05)
+                    return await open_connection(name)
+                finally:
+                    running.discard(name)
+
+            pool._open = slow_open
+            try:
+                async with pool.acquire_many(["motor1", "motor2", "motor3"]):
+                    raise AssertionError("acquired with motor1 unreachable")
+            except ConnectionError:
+                pass
+            assert not running
+            assert not any(lock.locked() for lock in pool._locks.values())
+
+            pool._open = open_connection
+            async with pool.acquire_many(["motor1", "motor2"]) as motors:
+                assert sorted(motors) == ["motor1", "motor2"]
+            await pool.close_all()
+
+    asyncio.run(run())
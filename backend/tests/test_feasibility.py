@@ -0,0 +1,57 @@
+"""
+Tension feasibility: the closed-form margin against a brute-force sweep, and the map's exact recheck near the threshold.
+"""
+
+import numpy as np
+
+from motor_driver.config import GeometrySettings, TensionSettings
+from feasibility import FeasibilityMap, tension_margin
+
+
+def brute_force_margin(anchors: np.ndarray, point, payload: float, t_min: float, t_max: float) -> float:
+    """Sweeps s along the equilibrium null space t = t0 + s * n and keeps the best margin."""
+    units = anchors - point
+    units /= np.linalg.norm(units, axis=1, keepdims=True)
+    u = units.T
+    base = np.linalg.lstsq(u, np.array([0.0, 0.0, payload]), rcond=None)[0]
+    null = np.linalg.svd(u)[2][-1]
+    s = np.linspace(-200, 200, 400001)[:, None]
+    tensions = base + s * null
+    return float(np.max(np.minimum(tensions - t_min, t_max - tensions).min(axis=1)))
+
+
+def test_margin_matches_a_brute_force_sweep():
+    geo = GeometrySettings()
+    anchors = np.array([geo.m1, geo.m2, geo.m3, geo.m4], dtype=float)
+    upper = np.array([geo.width_in, geo.height_in, geo.z_height_in])
+    points = np.random.default_rng(2).uniform(0.05, 0.95, (40, 3)) * upper
+
+    margin, tensions = tension_margin(anchors, points, 2.0, 0.1, 50.0)
+    for point, value, t in zip(points, margin, tensions):
+        assert abs(value - brute_force_margin(anchors, point, 2.0, 0.1, 50.0)) < 1e-3
+        units = (anchors - point) / np.linalg.norm(anchors - point, axis=1, keepdims=True)
+        # The reported tensions hold the payload and achieve the margin.
+        assert np.allclose(units.T @ t, [0.0, 0.0, 2.0], atol=1e-6)
+        assert abs(min((t - 0.1).min(), (50.0 - t).min()) - value) < 1e-6
+    assert (margin > 0).any() and (margin < 0).any()
+
+
+def test_map_rechecks_points_near_the_threshold_exactly(tmp_path):
+    geo = GeometrySettings()
+    feasibility = FeasibilityMap(geo, TensionSettings(), spacing=4.0, cache_dir=str(tmp_path))
+    upper = np.array([geo.width_in, geo.height_in, geo.z_height_in])
+    points = np.random.default_rng(3).uniform(0, 1, (20000, 3)) * upper
+
+    exact = feasibility.exact(points)[0]
+    interpolated = feasibility.margin(points)
+    for level in (0.0, 1.0):
+        checked = feasibility.margin(points, near=level)
+        # Never a different verdict from the exact margin...
+        assert np.array_equal(checked >= level, exact >= level)
+        # ...though the plain interpolation gets some of these wrong.
+        assert not np.array_equal(interpolated >= level, exact >= level)
+        assert np.array_equal(feasibility.feasible(points, min_margin=level), exact >= level)
+
+    # Grid nodes are exact without a recheck.
+    nodes = feasibility.grid.nodes(5).reshape(-1, 3)
+    assert np.allclose(feasibility.margin(nodes), feasibility.exact(nodes)[0], atol=1e-4)
@@ -0,0 +1,47 @@
+"""
+FrameDecoder splitting of eSCL replies, including the ack-then-data form some drives send.
+"""
+
+from motor_driver.framing import FrameDecoder
+
+
+def make_decoder() -> FrameDecoder:
+    return FrameDecoder(header=b"\x00\x07", terminator=b"\r", encoding="ascii", size=64)
+
+
+def test_bare_ack_waits_for_its_terminator():
+    decoder = make_decoder()
+    assert decoder.feed(b"+") == []
+    assert decoder.feed(b"\r\n") == ["+"]
+
+
+def test_ack_with_line_feed_is_one_frame():
+    assert make_decoder().feed(b"+\r\n") == ["+"]
+
+
+def test_ack_followed_by_data_is_one_reply():
+    decoder = make_decoder()
+    assert decoder.feed(b"+\r\n24567\r\n") == ["24567"]
+    assert decoder.feed(b"+") == []
+    assert decoder.feed(b"\r\n24568\r\n") == ["24568"]
+
+
+def test_data_only():
+    assert make_decoder().feed(b"24567\r\n") == ["24567"]
+
+
+def test_header_and_coalesced_frames():
+    decoder = make_decoder()
+    assert decoder.feed(b"\x00\x07%\r\x00\x07IP=1") == ["%"]
+    assert decoder.feed(b"20\r\x00\x07+\r") == ["IP=120", "+"]
+
+
+def test_buffer_grows_for_long_frames():
+    decoder = make_decoder()
+    payload = b"A" * 500
+    assert decoder.feed(payload[:300]) == []
+    assert decoder.feed(payload[300:] + b"\r") == ["A" * 500]
+
+
+def test_acks_without_line_feeds_stay_separate():
+    assert make_decoder().feed(b"+\r+\r") == ["+", "+"]
@@ -0,0 +1,106 @@
+"""
+KinematicsSolver planning, bulk solving and forward kinematics, without drives.
+"""
+
+import numpy as np
+
+from motor_driver.config import RigSettings, TensionSettings, config
+from motor_driver.motion import profile_duration
+from kinematic import MOTOR_NAMES, KinematicsSolver
+
+
+def make_solver() -> KinematicsSolver:
+    solver = KinematicsSolver(RigSettings(motors={}, tension=TensionSettings(feasibility_check=False)))
+    solver.calibrate_position(70, 70, 30, counts=[1000, -2000, 3000, 0])
+    return solver
+
+
+def test_solve_many_matches_plan():
+    solver = make_solver()
+    targets = [[80, 80, 25], [60, 90, 40], [70, 70, 30], [70.0005, 70, 30], [10, 130, 5]]
+    bulk = solver.solve_many(targets)
+
+    for row, target in enumerate(targets):
+        plan = solver.plan(*target)
+        assert np.allclose(bulk.lengths[row], solver._lengths(target))
+        assert bulk.durations[row] == plan.duration
+        if not plan.command_map:
+            continue
+        for i, name in enumerate(MOTOR_NAMES):
+            commands = plan.command_map[name]
+            assert f"VE{round(bulk.velocities[row, i], 4)}" in commands
+            assert f"AC{round(bulk.accels[row, i], 3)}" in commands
+            assert f"DE{round(bulk.decels[row, i], 3)}" in commands
+
+
+def test_profile_duration_is_vectorized():
+    steps = np.array([0, 10, 1000, 20000, 500000])
+    durations = profile_duration(steps, 5.0, 100.0, 50.0)
+    assert durations.shape == steps.shape
+    assert durations[0] == 0.0
+    assert np.all(np.diff(durations) > 0)
+    for s, d in zip(steps, durations):
+        assert profile_duration(int(s), 5.0, 100.0, 50.0) == d
+    # Long enough to cruise: ramps plus the cruise at 5 rev/s.
+    revs = 500000 / config.motion.steps_per_rev
+    ramp = 25 / 200 + 25 / 100
+    assert np.isclose(durations[-1], 5 / 100 + 5 / 50 + (revs - ramp) / 5)
+
+
+def test_straight_line_segments_stay_within_tolerance():
+    solver = make_solver()
+    start, end, tolerance = [10, 10, 5], [140, 140, 60], 0.05
+    points = solver.segment_line(start, end, tolerance)
+    assert 1 < len(points) < solver.config.kinematics.max_path_segments
+    assert points[-1] == end
+
+    pieces = list(zip([start] + points[:-1], points))
+    for a, b in pieces:
+        # On the line...
+        offset = np.cross(np.subtract(b, start), np.subtract(end, start))
+        assert np.linalg.norm(offset) < 1e-6 * np.linalg.norm(np.subtract(end, start)) ** 2
+        # ...and within the tolerance between the checked fractions too.
+        assert solver._line_deviation(a, b, np.linspace(0, 1, 201)).max() <= tolerance * 1.01
+
+    # Fewest pieces: no two neighbours could have been one move.
+    for (a, _), (_, c) in zip(pieces, pieces[1:]):
+        assert solver._line_deviation(a, c, np.linspace(0.05, 0.95, 19)).max() > tolerance
+
+
+def test_short_line_is_one_segment():
+    solver = make_solver()
+    assert solver.segment_line([70, 70, 30], [70.5, 70, 30], 0.05) == [[70.5, 70, 30]]
+
+
+def test_forward_many_recovers_positions():
+    solver = make_solver()
+    geo = solver.config.geometry
+    upper = np.array([geo.width_in, geo.height_in, geo.z_height_in])
+    points = np.random.default_rng(4).uniform(0.05, 0.95, (500, 3)) * upper
+    lengths = solver.lengths_many(points)
+
+    positions, rms = solver.forward_many(lengths)
+    assert np.allclose(positions, points, atol=1e-6)
+    assert rms.max() < 1e-6
+
+    # Warm-started from far away, rows that fit poorly are retried from trilateration.
+    positions, rms = solver.forward_many(lengths, initial=[0, 0, 0])
+    assert np.allclose(positions, points, atol=1e-6)
+
+    # Inconsistent lengths, e.g. a slack cable, show up as a residual.
+    slack = lengths.copy()
+    slack[:, 2] += 1.0
+    _, rms = solver.forward_many(slack)
+    assert np.median(rms) > 0.1
+
+
+def test_forward_counts_inverts_plan():
+    solver = make_solver()
+    for target in ([80, 80, 25], [60, 90, 40], [20, 120, 70]):
+        plan = solver.plan(*target)
+        solver.commit(plan)
+        position, residual = solver.forward_counts(plan.counts)
+        # Within the rounding of each cable to whole steps.
+        assert np.allclose(position, target, atol=0.01)
+        assert residual < solver.config.kinematics.kinematic_step_size
+        assert solver.estimated_position == position
@@ -0,0 +1,26 @@
+"""
+Queue-backed logging: arguments are captured at the call, tracebacks formatted by the listener.
+"""
+
+from motor_driver.config import LoggingSettings
+from motor_driver.logging_setup import get_logger, setup_logging, shutdown_logging
+
+
+def test_arguments_are_merged_when_logged(capsys):
+    setup_logging(LoggingSettings(level="INFO", levels={}, format="%(name)s %(message)s"))
+    try:
+        logger = get_logger("test")
+        state = {"position": 1}
+        logger.info("state %s", state)
+        state["position"] = 2
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logger.exception("failed at %s", state["position"])
+    finally:
+        shutdown_logging()
+
+    out = capsys.readouterr().out
+    assert "automic.test state {'position': 1}" in out
+    assert "automic.test failed at 2" in out
+    assert "Traceback" in out and "RuntimeError: boom" in out
@@ -0,0 +1,62 @@
+"""
+Histogram bucketing, Prometheus rendering and the per-drive series commands record.
+"""
+
+import asyncio
+
+from motor_driver import MotorController
+from motor_driver.metrics import Histogram, MetricsRegistry, metrics
+from simulator import SimulatedRig
+
+
+def test_histogram_buckets_are_upper_inclusive():
+    hist = Histogram((0.001, 0.01, 0.1))
+    for value in (0.0005, 0.001, 0.005, 0.5):
+        hist.observe(value)
+    assert hist.counts == [2, 1, 0, 1]
+    assert hist.count == 4
+    assert abs(hist.sum - 0.5065) < 1e-12
+
+
+def test_render_is_cumulative_and_labelled():
+    registry = MetricsRegistry()
+    registry.describe("rtt_seconds", "histogram", "Round trips.")
+    hist = registry.histogram("rtt_seconds", motor="motor1", command="VE")
+    assert registry.histogram("rtt_seconds", command="VE", motor="motor1") is hist
+    hist.observe(0.0004)
+    hist.observe(0.003)
+    registry.inc("timeouts_total", motor="motor2")
+    registry.inc("timeouts_total", 2, motor="motor2")
+    assert registry.counter_value("timeouts_total", motor="motor2") == 3
+
+    lines = registry.render().splitlines()
+    assert "# TYPE rtt_seconds histogram" in lines
+    assert "# HELP timeouts_total timeouts_total" in lines
+    assert 'timeouts_total{motor="motor2"} 3' in lines
+    assert 'rtt_seconds_bucket{command="VE",motor="motor1",le="0.0005"} 1' in lines
+    assert 'rtt_seconds_bucket{command="VE",motor="motor1",le="0.005"} 2' in lines
+    assert 'rtt_seconds_bucket{command="VE",motor="motor1",le="+Inf"} 2' in lines
+    assert 'rtt_seconds_count{command="VE",motor="motor1"} 2' in lines
+
+    registry.reset()
+    assert registry.render() == "\n"
+
+
+def test_commands_record_rtt_and_rejections():
+    async def run():
+        async with SimulatedRig() as sim:
+            controller = MotorController(sim.motor_settings(), rig="metrics-test")
+            try:
+                await controller.execute_async("motor1", ["VE3", "AC50"])
+                try:
+                    await controller.execute_async("motor1", ["DEbad"])
+                except Exception:
+                    pass
+            finally:
+                await controller.close()
+
+    asyncio.run(run())
+    labels = {"motor": "motor1", "rig": "metrics-test"}
+    assert metrics.histogram("automic_command_rtt_seconds", **labels, command="VE").count >= 1
+    assert metrics.histogram("automic_command_rtt_seconds", **labels, command="AC").count >= 1
+    assert metrics.counter_value("automic_command_rejected_total", **labels, command="DE") == 1
@@ -0,0 +1,191 @@
+"""
+Smoke tests of the move, stop and tension paths against simulated drives.
+"""
+
+import asyncio
+import math
+import random
+
+from motor_driver import MotorController
+from motor_driver.config import KinematicSettings, RigSettings, TensionSettings
+from kinematic import MOTOR_NAMES
+from rigs import Rig
+from simulator import SimulatedRig
+
+
+async def make_rig(sim: SimulatedRig, tmp_path, transport: str = "tcp", feasibility_check: bool = False) -> Rig:
+    settings = RigSettings(
+        motors=sim.motor_settings(transport),
+        # A coarse grid keeps the feasibility map quick to build.
+        kinematics=KinematicSettings(calibration_dir=str(tmp_path), grid_cache_dir=str(tmp_path), grid_spacing_in=4.0),
+        tension=TensionSettings(feasibility_check=feasibility_check),
+        default_speed=20.0,
+        default_accel=400.0,
+        default_decel=400.0,
+    )
+    rig = Rig("default", settings)
+    await rig.start()
+    return rig
+
+
+async def counter_position(rig: Rig):
+    counts = await rig.controller.read_positions_async()
+    counts = [counts[name] for name in MOTOR_NAMES]
+    position, _ = rig.solver.forward_counts(counts)
+    return counts, position
+
+
+def test_move_reaches_target(tmp_path):
+    async def run():
+        async with SimulatedRig() as sim:
+            rig = await make_rig(sim, tmp_path, feasibility_check=True)
+            try:
+                assert await rig.scheduler.calibrate(70, 70, 30)
+                for target in ([80, 80, 25], [60, 90, 40], [70, 70, 30]):
+                    status, motion = await rig.scheduler.submit(*target)
+                    assert status == "success"
+                    assert motion.timings["plan_ms"] > 0
+                    result = await motion
+                    assert result["move_ms"] > 0
+                    counts, position = await counter_position(rig)
+                    assert counts == rig.solver.counts
+                    assert math.dist(position, target) < 0.01
+            finally:
+                await rig.close()
+
+    asyncio.run(run())
+
+
+def test_emergency_stop_halts_motion_and_resyncs(tmp_path):
+    async def run():
+        async with SimulatedRig() as sim:
+            rig = await make_rig(sim, tmp_path)
+            try:
+                await rig.scheduler.calibrate(70, 70, 30)
+                status, motion = await rig.scheduler.submit(120, 120, 10)
+                assert status == "success"
+                await asyncio.sleep(motion.predicted_ms / 2000)
+
+                result = await rig.controller.emergency_stop_async()
+                assert result["stop_ms"] >= 0
+                assert not any(drive.state.moving for drive in sim.drives.values())
+                stopped = [drive.state.position for drive in sim.drives.values()]
+                await asyncio.sleep(0.05)
+                assert stopped == [drive.state.position for drive in sim.drives.values()]
+
+                # The next move is planned from the counters the stop left behind.
+                status, motion = await rig.scheduler.submit(60, 60, 30)
+                assert status == "success"
+                await motion
+                _, position = await counter_position(rig)
+                assert math.dist(position, [60, 60, 30]) < 0.01
+            finally:
+                await rig.close()
+
+    asyncio.run(run())
+
+
+def test_udp_stop_survives_datagram_loss(tmp_path):
+    async def run():
+        random.seed(7)
+        async with SimulatedRig(udp=True, loss=0.2) as sim:
+            controller = MotorController(sim.motor_settings("udp"))
+            await controller.stop_channel.open_all()
+            try:
+                for _ in range(20):
+                    result = await controller.emergency_stop_async()
+                    assert set(result) >= {f"{name}_ms" for name in MOTOR_NAMES}
+            finally:
+                await controller.close()
+
+    asyncio.run(run())
+
+
+def test_tension_poll_and_fix(tmp_path):
+    async def run():
+        async with SimulatedRig() as sim:
+            rig = await make_rig(sim, tmp_path, feasibility_check=True)
+            try:
+                readings = await rig.tension.poll_all()
+                assert [r.motor for r in readings] == rig.tension.sensor_motors
+                assert all(r.tension_status == "ok" for r in readings)
+
+                await rig.scheduler.calibrate(70, 70, 30)
+                before = sim.drives["motor3"].state.position
+                result = await rig.tension.fix_tension("motor3", "tighten")
+                assert sim.drives["motor3"].state.position - before == result["steps"]
+                _, position = await counter_position(rig)
+                assert math.dist(position, [70, 70, 30]) < 0.01
+            finally:
+                await rig.close()
+
+    asyncio.run(run())
+
+
+def test_tension_fix_does_not_interleave_with_a_move(tmp_path):
+    async def run():
+        async with SimulatedRig() as sim:
+            rig = await make_rig(sim, tmp_path)
+            try:
+                await rig.scheduler.calibrate(70, 70, 30)
+                for target in ([80, 80, 25], [70, 70, 30]):
+                    move = asyncio.create_task(rig.scheduler.submit(*target))
+                    await asyncio.sleep(0)
+                    fix = asyncio.create_task(rig.tension.fix_tension("motor3", "tighten"))
+                    status, motion = await move
+                    assert status == "success"
+                    await motion
+                    await fix
+                    counts, position = await counter_position(rig)
+                    assert counts == rig.solver.counts
+                    assert math.dist(position, target) < 0.01
+            finally:
+                await rig.close()
+
+    asyncio.run(run())
+
+
+def test_rejected_register_write_is_not_shadowed():
+    async def run():
+        async with SimulatedRig() as sim:
+            controller = MotorController(sim.motor_settings())
+            drive = sim.drives["motor1"]
+            try:
+                for _ in range(2):
+                    handled = drive.commands_handled
+                    try:
+                        await controller.execute_async("motor1", ["VEbad"])
+                    except Exception:
+                        pass
+                    else:
+                        raise AssertionError("rejected write reported as success")
+                    assert drive.commands_handled == handled + 1
+
+                await controller.execute_async("motor1", ["VE2"])
+                handled = drive.commands_handled
+                assert await controller.execute_async("motor1", ["VE2"], require_response=True) == ["%"]
+                assert drive.commands_handled == handled
+            finally:
+                await controller.close()
+
+    asyncio.run(run())
+
+
+def test_udp_moves_survive_datagram_loss(tmp_path):
+    async def run():
+        random.seed(3)
+        async with SimulatedRig(udp=True, loss=0.05) as sim:
+            rig = await make_rig(sim, tmp_path, transport="udp")
+            try:
+                await rig.scheduler.calibrate(70, 70, 30)
+                for target in ([80, 80, 25], [60, 90, 40], [90, 60, 20], [70, 70, 30]):
+                    status, motion = await rig.scheduler.submit(*target)
+                    assert status == "success"
+                    await motion
+                    counts, position = await counter_position(rig)
+                    assert counts == rig.solver.counts
+                    assert math.dist(position, target) < 0.01
+            finally:
+                await rig.close()
+
+    asyncio.run(run())
@@ -0,0 +1,47 @@
+"""
+Workspace grid lengths against exact solves, within the grid's stated error bound.
+"""
+
+import numpy as np
+
+from motor_driver.config import GeometrySettings, KinematicSettings, RigSettings, TensionSettings
+from kinematic import KinematicsSolver
+from workspace import WorkspaceGrid
+
+
+def random_points(count: int, seed: int = 0) -> np.ndarray:
+    geo = GeometrySettings()
+    upper = np.array([geo.width_in, geo.height_in, geo.z_height_in])
+    return np.random.default_rng(seed).uniform(0, 1, (count, 3)) * upper
+
+
+def test_grid_lengths_stay_within_their_bound(tmp_path):
+    geo = GeometrySettings()
+    grid = WorkspaceGrid(geo, spacing=2.0, cache_dir=str(tmp_path))
+    points = random_points(5000)
+
+    lengths, bound = grid.lengths(points)
+    exact = np.linalg.norm(points[:, None, :] - grid.anchors[None, :, :], axis=2)
+    assert np.all(np.abs(lengths - exact) <= bound)
+    assert np.median(bound) < 0.05
+
+    # Reopened from the cache file, not rebuilt.
+    again = WorkspaceGrid(geo, spacing=2.0, cache_dir=str(tmp_path))
+    assert np.array_equal(again.lengths(points)[0], lengths)
+
+
+def test_solver_falls_back_to_exact_lengths_above_the_tolerance(tmp_path):
+    kin = KinematicSettings(grid_enabled=True, grid_spacing_in=2.0, grid_tolerance_in=0.05, grid_cache_dir=str(tmp_path))
+    solver = KinematicsSolver(RigSettings(motors={}, kinematics=kin, tension=TensionSettings(feasibility_check=False)))
+    points = random_points(2000, seed=1)
+
+    exact = solver.lengths_many(points)
+    approximate = solver.lengths_many(points, tolerance=kin.grid_tolerance_in)
+    assert np.all(np.abs(approximate - exact) <= kin.grid_tolerance_in)
+    assert not np.array_equal(approximate, exact)
+
+    solver.calibrate_position(70, 70, 30, counts=[0, 0, 0, 0])
+    bulk = solver.solve_many(points[:50])
+    assert np.all(np.abs(bulk.lengths - exact[:50]) <= kin.grid_tolerance_in)
+    plan = solver.plan(*points[0])
+    assert np.allclose(plan.lengths, exact[0], atol=kin.grid_tolerance_in + kin.kinematic_step_size)
@@ -0,0 +1,163 @@
+"""
+Precomputed cable-length grid over the stage, memory-mapped from disk.
+"""
+
+import hashlib
+import json
+import math
+import os
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from motor_driver.config import GeometrySettings
+from motor_driver.logging_setup import get_logger
+
+logger = get_logger("workspace")
+
+# Bumped whenever the on-disk layout changes, so stale caches are rebuilt.
+_FORMAT_VERSION = 1
+
+# Relative rounding error of a float32 cable length.
+_FLOAT32_EPS = 2.0 ** -24
+
+
+def geometry_key(geometry: GeometrySettings, *extra) -> str:
+    """Short hash of the anchors, stage size and any extra parameters, used to name cache files."""
+    payload = json.dumps([_FORMAT_VERSION, geometry.model_dump(), *extra], sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+class WorkspaceGrid:
+    """
+    Cable lengths from all four anchors sampled on a regular grid covering
+    the stage, stored as float32 .npy files under `cache_dir` and opened
+    memory-mapped. Files are keyed by a hash of the geometry and spacing,
+    so a geometry change builds a new grid instead of reusing the old one.
+
+    lengths() interpolates trilinearly and returns a per-point error bound:
+    a cable length r has second derivatives of at most 1/r, so the
+    interpolation error is at most (hx² + hy² + hz²) / (8 r_min), where
+    r_min is the smallest distance from the anchor to the point's cell,
+    plus float32 rounding.
+    """
+
+    def __init__(self, geometry: GeometrySettings, spacing: float = 1.0, cache_dir: str = "workspace_cache"):
+        self.geometry = geometry
+        self.cache_dir = cache_dir
+        self.anchors = np.array([geometry.m1, geometry.m2, geometry.m3, geometry.m4], dtype=float)
+        self.upper = np.array([geometry.width_in, geometry.height_in, geometry.z_height_in], dtype=float)
+        self.shape = tuple(int(math.ceil(extent / spacing)) + 1 for extent in self.upper)
+        # Per-axis spacing, at most `spacing`, so the last node lands exactly on the stage edge.
+        self.step = self.upper / (np.array(self.shape) - 1)
+        self.key = geometry_key(geometry, spacing)
+        self._lengths: Optional[np.ndarray] = None
+        self._directions: Optional[np.ndarray] = None
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}-{self.key}.npy")
+
+    def nodes(self, i: int) -> np.ndarray:
+        """Grid points of the x-slice i, as (ny, nz, 3)."""
+        ys = np.arange(self.shape[1]) * self.step[1]
+        zs = np.arange(self.shape[2]) * self.step[2]
+        y, z = np.meshgrid(ys, zs, indexing="ij")
+        return np.stack([np.full_like(y, i * self.step[0]), y, z], axis=-1)
+
+    def load_or_build(self, name: str, trailing: Tuple[int, ...], fill: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """
+        Opens the cached field `name` read-only, building it first if it is
+        missing. `fill` maps one x-slice of grid points (ny, nz, 3) to that
+        slice's values (ny, nz, *trailing); the field is written one slice
+        at a time straight into the file and renamed into place when done.
+        """
+        path = self.path(name)
+        shape = self.shape + trailing
+        if os.path.exists(path):
+            field = np.load(path, mmap_mode="r")
+            if field.shape == shape and field.dtype == np.float32:
+                return field
+            logger.warning("Discarding cached %s with shape %s, expected %s", path, field.shape, shape)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        field = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=shape)
+        for i in range(self.shape[0]):
+            field[i] = fill(self.nodes(i))
+        field.flush()
+        del field
+        os.replace(tmp, path)
+        logger.info("Built workspace %s grid %s at %s", name, "x".join(map(str, self.shape)), path)
+        return np.load(path, mmap_mode="r")
+
+    @property
+    def lengths_grid(self) -> np.ndarray:
+        """(nx, ny, nz, 4) cable lengths at every grid node."""
+        if self._lengths is None:
+            self._lengths = self.load_or_build(
+                "lengths", (4,),
+                lambda p: np.linalg.norm(p[..., None, :] - self.anchors, axis=-1),
+            )
+        return self._lengths
+
+    @property
+    def directions_grid(self) -> np.ndarray:
+        """(nx, ny, nz, 4, 3) unit vectors from each anchor towards every grid node."""
+        if self._directions is None:
+            def fill(p: np.ndarray) -> np.ndarray:
+                offsets = p[..., None, :] - self.anchors
+                norms = np.linalg.norm(offsets, axis=-1, keepdims=True)
+                return offsets / np.maximum(norms, 1e-9)
+            self._directions = self.load_or_build("directions", (4, 3), fill)
+        return self._directions
+
+    def _cells(self, points) -> Tuple[np.ndarray, np.ndarray]:
+        """Lower-corner node indices (N, 3) of each point's cell and its fractional offsets (N, 3)."""
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        scaled = np.clip(points, 0, self.upper) / self.step
+        base = np.minimum(np.floor(scaled).astype(np.intp), np.array(self.shape) - 2)
+        return base, scaled - base
+
+    def _corners(self, field: np.ndarray, points) -> Tuple[np.ndarray, np.ndarray]:
+        """Field values at the 8 corners of each point's cell (8, N, ...) and their trilinear weights (8, N)."""
+        base, frac = self._cells(points)
+        strides = np.array([self.shape[1] * self.shape[2], self.shape[2], 1])
+        flat = field.reshape((-1,) + field.shape[3:])
+        origin = base @ strides
+        fx, fy, fz = frac.T
+
+        values, weights = [], []
+        for dx in (0, 1):
+            for dy in (0, 1):
+                for dz in (0, 1):
+                    values.append(np.take(flat, origin + (dx * strides[0] + dy * strides[1] + dz), axis=0))
+                    weights.append((fx if dx else 1 - fx) * (fy if dy else 1 - fy) * (fz if dz else 1 - fz))
+        return np.stack(values).astype(float), np.stack(weights)
+
+    def interpolate(self, field: np.ndarray, points) -> np.ndarray:
+        """Trilinear interpolation of a grid field at (N, 3) points on the stage."""
+        values, weights = self._corners(field, points)
+        return np.einsum("cn,cn...->n...", weights, values)
+
+    def error_bound(self, corners: np.ndarray) -> np.ndarray:
+        """
+        Guaranteed bound (inches) on the error of cable lengths interpolated
+        from the given (8, N, 4) cell-corner lengths, as (N, 4).
+        """
+        # Every point of a cell is within one cell diagonal of each corner.
+        reach = float(np.linalg.norm(self.step))
+        r_min = corners.min(axis=0) - reach
+        curvature = float(np.sum(self.step ** 2)) / 8
+        with np.errstate(divide="ignore"):
+            bound = np.where(r_min > 0, curvature / r_min, np.inf)
+        return bound + corners.max(axis=0) * 2 * _FLOAT32_EPS
+
+    def lengths(self, points) -> Tuple[np.ndarray, np.ndarray]:
+        """Interpolated (N, 4) cable lengths at the points and their error bounds."""
+        corners, weights = self._corners(self.lengths_grid, points)
+        return np.einsum("cn,cnm->nm", weights, corners), self.error_bound(corners)
+
+    def directions(self, points) -> np.ndarray:
+        """Interpolated, renormalized (N, 4, 3) cable direction vectors at the points."""
+        directions = self.interpolate(self.directions_grid, points)
+        return directions / np.maximum(np.linalg.norm(directions, axis=-1, keepdims=True), 1e-9)